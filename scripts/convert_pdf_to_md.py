@@ -15,24 +15,37 @@
 import fitz  # PyMuPDF
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Plain-text extraction: keep whitespace and clip to the page, but skip
+# ligature preservation and other post-processing we don't need
+_TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+def _extract_page(pdf_path, page_num):
+    # Each worker opens its own document handle; fitz documents can't be pickled
+    with fitz.open(pdf_path) as doc:
+        page = doc.load_page(page_num)
+        text = page.get_text("text", flags=_TEXT_FLAGS)
+        return f"## Page {page_num + 1}\n\n{text}\n\n"
 
 def convert_pdf_to_md(pdf_path, md_path):
     try:
-        # Open the PDF file
-        doc = fitz.open(pdf_path)
-        md_content = ""
+        # Open the PDF file just to count pages
+        with fitz.open(pdf_path) as doc:
+            page_count = len(doc)
 
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            # Get text from the page
-            text = page.get_text("text")
-            md_content += f"## Page {page_num + 1}\n\n"
-            md_content += text + "\n\n"
+        # Extract pages in parallel and stream them to the markdown file in
+        # page order, so the whole document is never held in memory
+        max_workers = min(os.cpu_count() or 1, 4)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor, open(
+            md_path, "w", encoding="utf-8", buffering=1 << 20
+        ) as f:
+            for chunk in executor.map(
+                _extract_page, repeat(pdf_path), range(page_count), chunksize=8
+            ):
+                f.write(chunk)
 
-        # Write to markdown file
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write(md_content)
-        
         print(f"Successfully converted '{pdf_path}' to '{md_path}'")
         return True
     except Exception as e:
@@ -12,13 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from pathlib import Path
+
 from setuptools import setup, find_packages
 
 setup(
     name="d2p",
     version="0.1.0",
     description="Docker-to-Python conversion system for running containers as native processes",
-    long_description=open("README.md").read(),
+    long_description=(Path(__file__).parent / "README.md").read_text(encoding="utf-8"),
     long_description_content_type="text/markdown",
     author="Michael Maillet, Damien Davison, Sacha Davison",
     license="Apache-2.0",
@@ -36,6 +38,9 @@ setup(
         "jinja2>=3.0",
     ],
     extras_require={
+        "fast": [
+            "orjson>=3.0",
+        ],
         "dev": [
             "black>=23.0",
             "pytest>=7.0",
@@ -17,16 +17,53 @@ Builders for converting Dockerfiles into internal image models and preparing env
 Supports executing Dockerfile instructions including FROM, COPY, ADD, RUN, and multi-stage builds.
 """
 import os
+import re
+import shlex
 import subprocess
 import shutil
+import stat
+import venv
+import weakref
 import hashlib
 import json
-from typing import Optional, Dict, List, Any
+import logging
+from typing import Optional, Dict, List, Any, Tuple
 from pathlib import Path
 from dataclasses import dataclass, field
 
+try:
+    import orjson
+except ImportError:  # orjson is an optional speedup
+    orjson = None  # type: ignore[assignment]
+
 from ..PARSERS.dockerfile_parser import DockerfileParser
 from ..MODELS.container_image import ContainerImage
+from ..MODELS.dockerfile_ast import Instruction
+from ..UTILS.file_copy import fast_copy
+
+logger = logging.getLogger(__name__)
+
+if orjson is not None:
+
+    def _dumps_index(index: Dict[str, Any]) -> bytes:
+        return orjson.dumps(index, option=orjson.OPT_INDENT_2)
+
+    _loads_index = orjson.loads
+else:
+
+    def _dumps_index(index: Dict[str, Any]) -> bytes:
+        return json.dumps(index, indent=2).encode()
+
+    _loads_index = json.loads
+
+# Location of pip inside a virtual environment on this platform
+_PIP_SUBPATH = ("Scripts", "pip.exe") if os.name == "nt" else ("bin", "pip")
+
+# Match ${VAR} or $VAR (not followed by more word chars)
+_BUILD_ARG_RE = re.compile(r"\$\{([^}]+)\}|\$([A-Za-z_][A-Za-z0-9_]*)")
+
+# Record separator used to substitute all values of an ENV line at once
+_ENV_VALUE_SEP = "\x1e"
 
 
 @dataclass
@@ -51,6 +88,13 @@ class BuildLayer:
     created_by: str
 
 
+def _write_index(index_file: Path, index: Dict[str, Any]) -> None:
+    """Atomically write a layer cache index to disk."""
+    tmp_file = index_file.with_suffix(".json.tmp")
+    tmp_file.write_bytes(_dumps_index(index))
+    os.replace(tmp_file, index_file)
+
+
 class LayerCache:
     """Content-addressable cache for build layers."""
 
@@ -65,21 +109,30 @@ class LayerCache:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.index_file = self.cache_dir / "build_cache.json"
         self._index = self._load_index()
+        # Pending index write; also runs if the cache is collected or at exit
+        self._pending_write: Optional[weakref.finalize] = None
 
     def _load_index(self) -> Dict[str, Any]:
         """Load cache index from disk."""
-        if self.index_file.exists():
-            try:
-                with open(self.index_file, "r") as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
-        return {"layers": {}}
-
-    def _save_index(self) -> None:
-        """Save cache index to disk."""
-        with open(self.index_file, "w") as f:
-            json.dump(self._index, f, indent=2)
+        try:
+            return _loads_index(self.index_file.read_bytes())
+        except (ValueError, IOError):
+            # Missing or corrupt index; start empty
+            return {"layers": {}}
+
+    def _mark_dirty(self) -> None:
+        """Schedule an index write; it doesn't hold a reference to self."""
+        if self._pending_write is None:
+            self._pending_write = weakref.finalize(
+                self, _write_index, self.index_file, self._index
+            )
+
+    def flush(self) -> None:
+        """Write the index to disk if it has changed since the last flush."""
+        if self._pending_write is not None:
+            # A finalizer runs at most once, so this also cancels the exit write
+            self._pending_write()
+            self._pending_write = None
 
     def get_cache_key(
         self, instruction: str, parent_digest: str, context_hash: Optional[str] = None
@@ -131,7 +184,8 @@ class LayerCache:
             "instruction": instruction,
             "created_at": self._get_timestamp(),
         }
-        self._save_index()
+        # Written out on flush() rather than once per layer
+        self._mark_dirty()
 
     def _get_timestamp(self) -> str:
         """Get current UTC timestamp."""
@@ -147,11 +201,58 @@ class LayerCache:
             Number of layers cleared
         """
         count = len(self._index["layers"])
-        self._index = {"layers": {}}
-        self._save_index()
+        # Cleared in place, since a pending write holds this dict
+        self._index["layers"] = {}
+        self._mark_dirty()
+        self.flush()
         return count
 
 
+def _build_from(image: ContainerImage, args: List[str]) -> None:
+    image.base_image = args[0]
+
+
+def _build_workdir(image: ContainerImage, args: List[str]) -> None:
+    image.working_directory = args[0]
+
+
+def _build_env(image: ContainerImage, args: List[str]) -> None:
+    # Handle ENV KEY=VALUE or ENV KEY VALUE
+    for arg in args:
+        if "=" in arg:
+            k, v = arg.split("=", 1)
+            image.env_vars[k] = v
+
+
+def _build_run(image: ContainerImage, args: List[str]) -> None:
+    run_cmd = " ".join(args)
+    image.run_instructions.append(run_cmd)
+    # Detect pip install
+    if "pip install" in run_cmd:
+        if "-r" in run_cmd:
+            # Should probably parse requirements file
+            image.pip_requirements.append("from requirements.txt")
+
+
+def _build_cmd(image: ContainerImage, args: List[str]) -> None:
+    image.cmd = args
+
+
+def _build_entrypoint(image: ContainerImage, args: List[str]) -> None:
+    image.entrypoint = args
+
+
+# Instruction handlers used by ImageBuilder.build
+_BUILD_HANDLERS = {
+    "FROM": _build_from,
+    "WORKDIR": _build_workdir,
+    "ENV": _build_env,
+    "RUN": _build_run,
+    "CMD": _build_cmd,
+    "ENTRYPOINT": _build_entrypoint,
+}
+
+
 class ImageBuilder:
     """
     Analyzes Dockerfiles and builds an internal representation of the image,
@@ -166,6 +267,22 @@ class ImageBuilder:
         """
         self.base_dir = base_dir
         self.parser = DockerfileParser()
+        self._parse_cache: Dict[str, Tuple[int, int, List[Instruction]]] = {}
+
+    def _parse_cached(self, dockerfile_path: str) -> List[Instruction]:
+        """
+        Parse a Dockerfile, reusing the previous result while the file is unchanged.
+
+        The returned list is shared between calls and must be treated as read-only.
+        """
+        st = os.stat(dockerfile_path)
+        cached = self._parse_cache.get(dockerfile_path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+
+        instructions = self.parser.parse(dockerfile_path)
+        self._parse_cache[dockerfile_path] = (st.st_mtime_ns, st.st_size, instructions)
+        return instructions
 
     def build(self, dockerfile_path: str, image_name: str) -> ContainerImage:
         """
@@ -176,35 +293,14 @@ class ImageBuilder:
         :return: A ContainerImage instance.
         """
         full_path = os.path.join(self.base_dir, dockerfile_path)
-        instructions = self.parser.parse(full_path)
+        instructions = self._parse_cached(full_path)
 
         image = ContainerImage(name=image_name, base_image="")
 
         for inst in instructions:
-            cmd = inst.instruction
-            args = inst.arguments
-
-            if cmd == "FROM":
-                image.base_image = args[0]
-            elif cmd == "WORKDIR":
-                image.working_directory = args[0]
-            elif cmd == "ENV":
-                # Handle ENV KEY=VALUE or ENV KEY VALUE
-                for arg in args:
-                    if "=" in arg:
-                        k, v = arg.split("=", 1)
-                        image.env_vars[k] = v
-            elif cmd == "RUN":
-                image.run_instructions.append(" ".join(args))
-                # Detect pip install
-                if "pip install" in " ".join(args):
-                    if "-r" in " ".join(args):
-                        # Should probably parse requirements file
-                        image.pip_requirements.append("from requirements.txt")
-            elif cmd == "CMD":
-                image.cmd = args
-            elif cmd == "ENTRYPOINT":
-                image.entrypoint = args
+            handler = _BUILD_HANDLERS.get(inst.instruction)
+            if handler:
+                handler(image, inst.arguments)
 
         return image
 
@@ -213,28 +309,56 @@ class ImageBuilder:
         Creates a virtual environment for the service and installs dependencies.
         """
         venv_path = os.path.join(self.base_dir, ".d2p", "venvs", image.name)
-        print(f"Preparing environment for {image.name} in {venv_path}")
+        logger.info("Preparing environment for %s in %s", image.name, venv_path)
 
         if not os.path.exists(venv_path):
             os.makedirs(os.path.dirname(venv_path), exist_ok=True)
-            subprocess.run(["python", "-m", "venv", venv_path], check=True)
+            venv.EnvBuilder(with_pip=True, symlinks=os.name != "nt").create(venv_path)
 
-        pip_path = (
-            os.path.join(venv_path, "Scripts", "pip.exe")
-            if os.name == "nt"
-            else os.path.join(venv_path, "bin", "pip")
-        )
+        pip_path = os.path.join(venv_path, *_PIP_SUBPATH)
 
+        # Batch every pip install into a single invocation of the venv pip
+        install_args: List[str] = []
         for inst in image.run_instructions:
-            if "pip install" in inst:
-                print(f"Executing dependency installation: {inst}")
-                # Replace 'pip' with the actual venv pip path
-                cmd = inst.replace("pip", pip_path)
-                subprocess.run(cmd, shell=True, check=True)
+            if "pip" in inst:
+                install_args.extend(self._pip_install_args(inst))
+
+        if install_args:
+            logger.info("Installing dependencies: %s", " ".join(install_args))
+            subprocess.run([pip_path, "install", *install_args], check=True)
 
         # Store venv path in image for later use by process runner
         image.labels["d2p.venv_path"] = venv_path
 
+    def _pip_install_args(self, instruction: str) -> List[str]:
+        """Extract the arguments of every 'pip install' command in a RUN instruction."""
+        lexer = shlex.shlex(instruction, posix=True, punctuation_chars="&|;")
+        lexer.whitespace_split = True
+        lexer.commenters = ""
+        try:
+            tokens = list(lexer)
+        except ValueError:
+            # Unbalanced quotes; nothing we can safely hand to pip
+            return []
+
+        # Split chained shell commands into individual argv lists
+        commands: List[List[str]] = [[]]
+        for token in tokens:
+            if token and set(token) <= set("&|;"):
+                commands.append([])
+            else:
+                commands[-1].append(token)
+
+        args: List[str] = []
+        for argv in commands:
+            # Match only real pip executables, never 'pip' inside a package name
+            if argv[:3] in (["python", "-m", "pip"], ["python3", "-m", "pip"]):
+                argv = argv[2:]
+            if len(argv) >= 2 and argv[1] == "install":
+                if os.path.basename(argv[0]) in ("pip", "pip3"):
+                    args.extend(argv[2:])
+        return args
+
     def build_with_context(self, context: BuildContext) -> ContainerImage:
         """
         Build an image with full context support including COPY, ADD, and multi-stage builds.
@@ -246,7 +370,7 @@ class ImageBuilder:
             Built ContainerImage.
         """
         full_path = os.path.join(context.base_dir, context.dockerfile_path)
-        instructions = self.parser.parse(full_path)
+        instructions = self._parse_cached(full_path)
 
         # Initialize layer cache
         cache_dir = os.path.join(context.base_dir, ".d2p", "cache", "build")
@@ -256,7 +380,9 @@ class ImageBuilder:
         stages: Dict[str, ContainerImage] = {}
         current_stage: Optional[str] = None
         current_image: Optional[ContainerImage] = None
-        parent_digest = "base"
+        # Rolling digest of the current stage's layer chain; take
+        # layer_digest.hexdigest() wherever a cache key is needed
+        layer_digest = hashlib.blake2b(b"base", digest_size=8)
 
         for inst in instructions:
             cmd = inst.instruction
@@ -279,7 +405,9 @@ class ImageBuilder:
                 current_image = ContainerImage(
                     name=context.image_name, base_image=base_ref
                 )
-                parent_digest = f"from:{base_ref}"
+                layer_digest = hashlib.blake2b(
+                    b"from\x00" + base_ref.encode(), digest_size=8
+                )
 
                 # Check if this is a reference to a previous stage
                 if base_ref in stages:
@@ -293,16 +421,23 @@ class ImageBuilder:
 
             elif cmd == "WORKDIR":
                 current_image.working_directory = args[0]
-                parent_digest = self._update_digest(parent_digest, f"workdir:{args[0]}")
+                layer_digest.update(b"workdir\x00" + args[0].encode())
 
             elif cmd == "ENV":
-                for arg in args:
-                    if "=" in arg:
-                        k, v = arg.split("=", 1)
-                        # Apply build args substitution
-                        v = self._substitute_build_args(v, context.build_args)
-                        current_image.env_vars[k] = v
-                parent_digest = self._update_digest(parent_digest, f"env:{args}")
+                pairs = [arg.split("=", 1) for arg in args if "=" in arg]
+                # Apply build args substitution in a single pass over the line
+                values = self._substitute_build_args(
+                    _ENV_VALUE_SEP.join(v for _, v in pairs), context.build_args
+                ).split(_ENV_VALUE_SEP)
+                if len(values) != len(pairs):
+                    # A value contained the separator; substitute one by one
+                    values = [
+                        self._substitute_build_args(v, context.build_args)
+                        for _, v in pairs
+                    ]
+                for (k, _), v in zip(pairs, values):
+                    current_image.env_vars[k] = v
+                layer_digest.update(b"env\x00" + "\x00".join(args).encode())
 
             elif cmd == "ARG":
                 # Build argument
@@ -320,17 +455,17 @@ class ImageBuilder:
                 # Apply build args and env substitution
                 run_cmd = self._substitute_build_args(run_cmd, context.build_args)
                 current_image.run_instructions.append(run_cmd)
-                parent_digest = self._update_digest(parent_digest, f"run:{run_cmd}")
+                layer_digest.update(b"run\x00" + run_cmd.encode())
 
             elif cmd == "COPY":
                 # Handle COPY instruction
                 self._handle_copy(current_image, args, context, stages)
-                parent_digest = self._update_digest(parent_digest, f"copy:{args}")
+                layer_digest.update(b"copy\x00" + "\x00".join(args).encode())
 
             elif cmd == "ADD":
                 # Handle ADD instruction (similar to COPY but with extra features)
                 self._handle_add(current_image, args, context)
-                parent_digest = self._update_digest(parent_digest, f"add:{args}")
+                layer_digest.update(b"add\x00" + "\x00".join(args).encode())
 
             elif cmd == "CMD":
                 current_image.cmd = args
@@ -366,6 +501,19 @@ class ImageBuilder:
         if current_stage and current_image:
             stages[current_stage] = current_image
 
+        layer_cache.flush()
+
+        # Persist COPY/ADD instructions into labels once per stage
+        for stage_image in stages.values():
+            if stage_image.copy_instructions:
+                stage_image.labels["d2p.copy_instructions"] = json.dumps(
+                    stage_image.copy_instructions
+                )
+            if stage_image.add_instructions:
+                stage_image.labels["d2p.add_instructions"] = json.dumps(
+                    stage_image.add_instructions
+                )
+
         # Return target stage or final stage
         if context.target_stage and context.target_stage in stages:
             return stages[context.target_stage]
@@ -374,23 +522,17 @@ class ImageBuilder:
             name=context.image_name, base_image="scratch"
         )
 
-    def _update_digest(self, parent: str, instruction: str) -> str:
-        """Update the running digest with a new instruction."""
-        combined = f"{parent}|{instruction}"
-        return hashlib.sha256(combined.encode()).hexdigest()[:16]
-
     def _substitute_build_args(self, value: str, build_args: Dict[str, str]) -> str:
         """Substitute build arguments in a value."""
-        import re
+        if "$" not in value:
+            return value
 
         # Handle ${VAR} and $VAR syntax
         def replace_var(match):
             var_name = match.group(1) or match.group(2)
             return build_args.get(var_name, match.group(0))
 
-        # Match ${VAR} or $VAR (not followed by more word chars)
-        pattern = r"\$\{([^}]+)\}|\$([A-Za-z_][A-Za-z0-9_]*)"
-        return re.sub(pattern, replace_var, value)
+        return _BUILD_ARG_RE.sub(replace_var, value)
 
     def _handle_copy(
         self,
@@ -423,13 +565,7 @@ class ImageBuilder:
 
         # Store copy instruction for later execution
         copy_info = {"sources": sources, "dest": dest, "from_stage": from_stage}
-
-        if "d2p.copy_instructions" not in image.labels:
-            image.labels["d2p.copy_instructions"] = json.dumps([])
-
-        copies = json.loads(image.labels["d2p.copy_instructions"])
-        copies.append(copy_info)
-        image.labels["d2p.copy_instructions"] = json.dumps(copies)
+        image.copy_instructions.append(copy_info)
 
     def _handle_add(
         self, image: ContainerImage, args: List[str], context: BuildContext
@@ -450,13 +586,7 @@ class ImageBuilder:
             "dest": dest,
             "type": "add",  # Indicates it's ADD not COPY
         }
-
-        if "d2p.add_instructions" not in image.labels:
-            image.labels["d2p.add_instructions"] = json.dumps([])
-
-        adds = json.loads(image.labels["d2p.add_instructions"])
-        adds.append(add_info)
-        image.labels["d2p.add_instructions"] = json.dumps(adds)
+        image.add_instructions.append(add_info)
 
     def execute_copies(
         self, image: ContainerImage, dest_dir: str, build_context_dir: str
@@ -469,10 +599,13 @@ class ImageBuilder:
             dest_dir: Destination directory (rootfs)
             build_context_dir: Directory containing build context files
         """
-        if "d2p.copy_instructions" not in image.labels:
-            return
+        copies = image.copy_instructions
+        if not copies and "d2p.copy_instructions" in image.labels:
+            # Images restored from labels only carry the serialized form
+            copies = json.loads(image.labels["d2p.copy_instructions"])
 
-        copies = json.loads(image.labels["d2p.copy_instructions"])
+        # Stat each context path once, even if several COPYs reference it
+        source_stats: Dict[str, Optional[os.stat_result]] = {}
 
         for copy_info in copies:
             sources = copy_info["sources"]
@@ -488,32 +621,41 @@ class ImageBuilder:
             dest_path.parent.mkdir(parents=True, exist_ok=True)
 
             for source in sources:
-                source_path = Path(build_context_dir) / source
+                source_path = os.path.join(build_context_dir, source)
 
-                if not source_path.exists():
-                    print(f"Warning: COPY source not found: {source}")
+                if source_path not in source_stats:
+                    try:
+                        source_stats[source_path] = os.stat(source_path)
+                    except OSError:
+                        # Missing, unreachable or unreadable, as exists() saw it
+                        source_stats[source_path] = None
+                source_stat = source_stats[source_path]
+
+                if source_stat is None:
+                    logger.warning("COPY source not found: %s", source)
                     continue
 
-                if source_path.is_dir():
-                    if dest_path.exists() and dest_path.is_dir():
-                        shutil.copytree(
-                            str(source_path), str(dest_path), dirs_exist_ok=True
-                        )
-                    else:
-                        shutil.copytree(str(source_path), str(dest_path))
+                if stat.S_ISDIR(source_stat.st_mode):
+                    shutil.copytree(
+                        source_path,
+                        str(dest_path),
+                        copy_function=fast_copy,
+                        dirs_exist_ok=True,
+                    )
+                elif dest.endswith("/") or dest_path.is_dir():
+                    dest_path.mkdir(parents=True, exist_ok=True)
+                    fast_copy(
+                        source_path, str(dest_path / os.path.basename(source_path))
+                    )
                 else:
-                    if dest.endswith("/") or (
-                        dest_path.exists() and dest_path.is_dir()
-                    ):
-                        dest_path.mkdir(parents=True, exist_ok=True)
-                        shutil.copy2(
-                            str(source_path), str(dest_path / source_path.name)
-                        )
-                    else:
-                        shutil.copy2(str(source_path), str(dest_path))
+                    fast_copy(source_path, str(dest_path))
 
     def execute_run_instructions(
-        self, image: ContainerImage, rootfs: str, env: Optional[Dict[str, str]] = None
+        self,
+        image: ContainerImage,
+        rootfs: str,
+        env: Optional[Dict[str, str]] = None,
+        verbose: bool = False,
     ) -> bool:
         """
         Execute RUN instructions in the image.
@@ -522,6 +664,7 @@ class ImageBuilder:
             image: Container image with run instructions
             rootfs: Path to the rootfs
             env: Additional environment variables
+            verbose: Capture stdout as well as stderr for failure reports
 
         Returns:
             True if all commands succeeded
@@ -535,7 +678,7 @@ class ImageBuilder:
         actual_work_dir = os.path.join(rootfs, work_dir.lstrip("/"))
 
         for instruction in image.run_instructions:
-            print(f"RUN: {instruction}")
+            logger.info("RUN: %s", instruction)
 
             try:
                 result = subprocess.run(
@@ -543,18 +686,31 @@ class ImageBuilder:
                     shell=True,
                     env=run_env,
                     cwd=actual_work_dir if os.path.exists(actual_work_dir) else rootfs,
-                    capture_output=True,
+                    # Discard stdout unless asked for; only stderr is
+                    # needed to report a failure
+                    stdout=subprocess.PIPE if verbose else subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
                     text=True,
                 )
 
                 if result.returncode != 0:
-                    print(f"Error executing RUN instruction: {instruction}")
-                    print(f"stdout: {result.stdout}")
-                    print(f"stderr: {result.stderr}")
+                    if verbose:
+                        logger.error(
+                            "Error executing RUN instruction: %s\nstdout: %s\nstderr: %s",
+                            instruction,
+                            result.stdout,
+                            result.stderr,
+                        )
+                    else:
+                        logger.error(
+                            "Error executing RUN instruction: %s\nstderr: %s",
+                            instruction,
+                            result.stderr,
+                        )
                     return False
 
             except Exception as e:
-                print(f"Error executing RUN instruction: {e}")
+                logger.error("Error executing RUN instruction: %s", e)
                 return False
 
         return True
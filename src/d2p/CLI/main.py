@@ -16,15 +16,17 @@
 Command Line Interface for D2P.
 """
 import click
+import functools
 import os
+import signal
 import sys
-from typing import Union
-from ..PARSERS.compose_parser import ComposeParser
-from ..MANAGERS.service_orchestrator import ServiceOrchestrator
-from ..MANAGERS.log_aggregator import LogAggregator
-from ..MANAGERS.volume_manager import VolumeManager
-from ..CONVERTERS.to_python_package import PythonPackageConverter
-from ..CONVERTERS.to_systemd import SystemdConverter
+from typing import TYPE_CHECKING, Dict, Optional, Union
+
+# Heavy submodules are imported inside the commands that use them so that
+# `d2p --help`, `d2p info` etc. don't pay for yaml/pydantic/jinja2 imports.
+if TYPE_CHECKING:
+    from ..CONVERTERS.to_python_package import PythonPackageConverter
+    from ..CONVERTERS.to_systemd import SystemdConverter
 
 
 @click.group()
@@ -40,8 +42,11 @@ def cli(ctx, file):
     ctx.ensure_object(dict)
     ctx.obj["file"] = file
     if os.path.exists(file):
+        from ..PARSERS.compose_parser import ComposeParser
+        from ..MANAGERS.service_orchestrator import ServiceOrchestrator
+
         parser = ComposeParser()
-        ctx.obj["config"] = parser.parse(file)
+        ctx.obj["config"] = parser.parse_cached(file, os.path.join(".d2p", "cache"))
         ctx.obj["orchestrator"] = ServiceOrchestrator(ctx.obj["config"])
 
 
@@ -58,11 +63,7 @@ def up(ctx, detach):
 
             if not detach:
                 click.echo("Running... Press Ctrl+C to stop.")
-                # Keep main thread alive and wait for interrupt
-                import time
-
-                while True:
-                    time.sleep(1)
+                _wait_for_interrupt()
         except KeyboardInterrupt:
             click.echo("\nStopping services...")
             orchestrator.down()
@@ -91,10 +92,10 @@ def ps(ctx):
     orchestrator = ctx.obj.get("orchestrator")
     if orchestrator:
         status = orchestrator.ps()
-        click.echo(f"{'SERVICE':20} {'STATUS':15}")
-        click.echo("-" * 35)
-        for name, state in status.items():
-            click.echo(f"{name:20} {state:15}")
+        fmt = "{:20} {:15}".format
+        lines = [fmt("SERVICE", "STATUS"), "-" * 35]
+        lines.extend(fmt(name, state) for name, state in status.items())
+        click.echo("\n".join(lines))
     else:
         click.echo(f"Error: {ctx.obj['file']} not found.")
 
@@ -112,6 +113,8 @@ def logs(ctx, services):
     if not services:
         services = list(config.services.keys())
 
+    from ..MANAGERS.log_aggregator import LogAggregator
+
     aggregator = LogAggregator(".d2p/logs")
     aggregator.tail_logs(list(services))
 
@@ -129,12 +132,15 @@ def convert(ctx, type, out):
         click.echo(f"Error: {ctx.obj['file']} not found.")
         return
 
+    converter: Union["PythonPackageConverter", "SystemdConverter"]
     if type == "python":
-        converter: Union[PythonPackageConverter, SystemdConverter] = (
-            PythonPackageConverter(config, source_dir=".")
-        )
+        from ..CONVERTERS.to_python_package import PythonPackageConverter
+
+        converter = PythonPackageConverter(config, source_dir=".")
         converter.convert(out)
     elif type == "systemd":
+        from ..CONVERTERS.to_systemd import SystemdConverter
+
         converter = SystemdConverter(config)
         converter.convert(out)
 
@@ -149,6 +155,8 @@ def volume():
 @volume.command("ls")
 def volume_list():
     """List all volumes."""
+    from ..MANAGERS.volume_manager import VolumeManager
+
     vm = VolumeManager()
     volumes = vm.list_volumes()
 
@@ -156,18 +164,27 @@ def volume_list():
         click.echo("No volumes found.")
         return
 
-    click.echo(f"{'VOLUME NAME':30} {'DRIVER':10} {'SIZE':15}")
-    click.echo("-" * 55)
-    for vol in volumes:
-        size = vm.get_volume_size(vol.name)
-        size_str = _format_size(size)
-        click.echo(f"{vol.name:30} {vol.driver:10} {size_str:15}")
+    # Sizing walks each volume's tree; overlap the I/O across volumes
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        sizes = list(executor.map(vm.get_volume_size, [vol.name for vol in volumes]))
+
+    fmt = "{:30} {:10} {:15}".format
+    lines = [fmt("VOLUME NAME", "DRIVER", "SIZE"), "-" * 55]
+    lines.extend(
+        fmt(vol.name, vol.driver, _format_size(size))
+        for vol, size in zip(volumes, sizes)
+    )
+    click.echo("\n".join(lines))
 
 
 @volume.command("create")
 @click.argument("name")
 def volume_create(name):
     """Create a volume."""
+    from ..MANAGERS.volume_manager import VolumeManager
+
     vm = VolumeManager()
     vol = vm.create_volume(name)
     click.echo(f"Created volume: {vol.name}")
@@ -178,6 +195,8 @@ def volume_create(name):
 @click.option("--force", "-f", is_flag=True, help="Force removal")
 def volume_remove(name, force):
     """Remove a volume."""
+    from ..MANAGERS.volume_manager import VolumeManager
+
     vm = VolumeManager()
     if vm.remove_volume(name, force=force):
         click.echo(f"Removed volume: {name}")
@@ -188,6 +207,8 @@ def volume_remove(name, force):
 @volume.command("prune")
 def volume_prune():
     """Remove unused volumes."""
+    from ..MANAGERS.volume_manager import VolumeManager
+
     vm = VolumeManager()
     result = vm.prune()
     click.echo(f"Removed {len(result['volumes_removed'])} volume(s)")
@@ -227,11 +248,14 @@ def image_list():
             click.echo("No images found.")
             return
 
-        click.echo(f"{'REFERENCE':40} {'SIZE':15} {'PULLED':25}")
-        click.echo("-" * 80)
-        for img in images:
-            size_str = _format_size(img.size)
-            click.echo(f"{img.reference[:40]:40} {size_str:15} {img.pulled_at[:25]:25}")
+        # Precision truncates the unbounded columns in the same format pass
+        fmt = "{:40.40} {:15} {:25.25}".format
+        lines = [fmt("REFERENCE", "SIZE", "PULLED"), "-" * 80]
+        lines.extend(
+            fmt(img.reference, _format_size(img.size), img.pulled_at)
+            for img in images
+        )
+        click.echo("\n".join(lines))
     except Exception as e:
         click.echo(f"Error listing images: {e}")
 
@@ -270,43 +294,70 @@ def info():
     click.echo(f"Python: {sys.version.split()[0]}")
     click.echo(f"Platform: {sys.platform}")
 
-    # Check isolation capabilities
+    caps = _capabilities()
+    lines = [
+        "\nIsolation capabilities:",
+        f"  Linux: {'Yes' if caps['linux'] else 'No'}",
+        f"  Root: {'Yes' if caps['root'] else 'No'}",
+    ]
+    if caps["linux"]:
+        lines.append(f"  Cgroups v2: {'Yes' if caps['cgroups_v2'] else 'No'}")
+        if "user_namespaces" in caps:
+            user_ns = caps["user_namespaces"]
+            state = "Unknown" if user_ns is None else "Yes" if user_ns else "No"
+            lines.append(f"  User namespaces: {state}")
+    click.echo("\n".join(lines))
+
+
+def _wait_for_interrupt() -> None:
+    """Block the main thread until interrupted (Ctrl+C raises KeyboardInterrupt)."""
+    if hasattr(signal, "pause"):
+        # Sleep in the kernel until a signal arrives instead of polling
+        while True:
+            signal.pause()
+    else:
+        import time
+
+        while True:
+            time.sleep(1)
+
+
+@functools.lru_cache(maxsize=1)
+def _capabilities() -> Dict[str, Optional[bool]]:
+    """
+    Probe the host's isolation capabilities once per process.
+
+    "user_namespaces" is only present when the kernel exposes the
+    unprivileged_userns_clone sysctl, and is None if it couldn't be read.
+    """
     is_linux = sys.platform.startswith("linux")
-    is_root = False
+    caps: Dict[str, Optional[bool]] = {
+        "linux": is_linux,
+        "root": is_linux and hasattr(os, "geteuid") and os.geteuid() == 0,
+        "cgroups_v2": False,
+    }
     if is_linux:
+        caps["cgroups_v2"] = os.path.exists("/sys/fs/cgroup/cgroup.controllers")
         try:
-            is_root = os.geteuid() == 0
-        except AttributeError:
+            with open("/proc/sys/kernel/unprivileged_userns_clone", "rb") as f:
+                caps["user_namespaces"] = f.read(4).strip() == b"1"
+        except FileNotFoundError:
             pass
+        except OSError:
+            caps["user_namespaces"] = None
+    return caps
 
-    click.echo(f"\nIsolation capabilities:")
-    click.echo(f"  Linux: {'Yes' if is_linux else 'No'}")
-    click.echo(f"  Root: {'Yes' if is_root else 'No'}")
-
-    if is_linux:
-        # Check cgroup v2
-        cgroup_v2 = os.path.exists("/sys/fs/cgroup/cgroup.controllers")
-        click.echo(f"  Cgroups v2: {'Yes' if cgroup_v2 else 'No'}")
 
-        # Check user namespaces
-        user_ns_file = "/proc/sys/kernel/unprivileged_userns_clone"
-        if os.path.exists(user_ns_file):
-            try:
-                with open(user_ns_file, "r") as f:
-                    user_ns = f.read().strip() == "1"
-                click.echo(f"  User namespaces: {'Yes' if user_ns else 'No'}")
-            except:
-                click.echo("  User namespaces: Unknown")
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB", "PB")
 
 
 def _format_size(size_bytes: int) -> str:
     """Format a size in bytes to human readable string."""
-    size_float = float(size_bytes)
-    for unit in ["B", "KB", "MB", "GB", "TB"]:
-        if size_float < 1024:
-            return f"{size_float:.1f} {unit}"
-        size_float /= 1024
-    return f"{size_float:.1f} PB"
+    if size_bytes <= 0:
+        return f"{float(size_bytes):.1f} B"
+    # Each unit is 2**10 times the previous one, so the bit length picks it
+    idx = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (idx * 10)):.1f} {_SIZE_UNITS[idx]}"
 
 
 def main():
@@ -17,14 +17,33 @@ Converters for transforming Docker Compose configurations into standalone Python
 """
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from ..MODELS.orchestration_config import OrchestrationConfig
+from ..UTILS.file_copy import ensure_dir, fast_copy, write_file
+
+# Entries never copied from the source tree
+IGNORED_NAMES = {".git", "__pycache__", ".pytest_cache"}
 
 PACKAGE_MAIN_TEMPLATE = """
 import os
+import signal
 import sys
+import threading
 from d2p.PARSERS.compose_parser import ComposeParser
 from d2p.MANAGERS.service_orchestrator import ServiceOrchestrator
 
+def wait_for_shutdown():
+    # Sleep until SIGINT/SIGTERM arrives instead of polling
+    if hasattr(signal, "pthread_sigmask"):
+        signals = {signal.SIGINT, signal.SIGTERM}
+        signal.pthread_sigmask(signal.SIG_BLOCK, signals)
+        try:
+            signal.sigwait(signals)
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, signals)
+    else:
+        threading.Event().wait()
+
 def main():
     base_dir = os.path.dirname(os.path.abspath(__file__))
     compose_file = os.path.join(base_dir, "docker-compose.yml")
@@ -40,17 +59,22 @@ def main():
     try:
         orchestrator.up()
         print("Services are running. Press Ctrl+C to stop.")
-        import time
-        while True:
-            time.sleep(1)
+        wait_for_shutdown()
     except KeyboardInterrupt:
-        orchestrator.down()
-        print("Services stopped.")
+        pass
+    orchestrator.down()
+    print("Services stopped.")
 
 if __name__ == "__main__":
     main()
 """
 
+# Generated files, encoded once at import: (name relative to output, bytes)
+GENERATED_FILES = (
+    ("run_native.py", PACKAGE_MAIN_TEMPLATE.encode()),
+    ("requirements_native.txt", b"d2p\n"),
+)
+
 
 class PythonPackageConverter:
     """
@@ -58,15 +82,23 @@ class PythonPackageConverter:
     that uses d2p to run services.
     """
 
-    def __init__(self, config: OrchestrationConfig, source_dir: str):
+    def __init__(
+        self,
+        config: OrchestrationConfig,
+        source_dir: str,
+        preserve_xattrs: bool = False,
+    ):
         """
         Initializes the converter.
 
         :param config: The parsed orchestration configuration.
         :param source_dir: The source directory containing the project files.
+        :param preserve_xattrs: Copy files with shutil.copy2 to also keep extended
+            attributes. By default only mode and timestamps are preserved.
         """
         self.config = config
         self.source_dir = os.path.abspath(source_dir)
+        self.preserve_xattrs = preserve_xattrs
 
     def convert(self, output_dir: str):
         """
@@ -75,27 +107,47 @@ class PythonPackageConverter:
         :param output_dir: The directory where the package will be generated.
         :return: The path to the generated package.
         """
-        os.makedirs(output_dir, exist_ok=True)
-
-        # 1. Copy original source (excluding what we don't want)
-        for item in os.listdir(self.source_dir):
-            if item in [".git", "__pycache__", ".pytest_cache", output_dir]:
-                continue
-            s = os.path.join(self.source_dir, item)
-            d = os.path.join(output_dir, item)
-            if os.path.isdir(s):
-                shutil.copytree(s, d, dirs_exist_ok=True)
-            else:
-                shutil.copy2(s, d)
-
-        # 2. Generate main entry point
-        with open(os.path.join(output_dir, "run_native.py"), "w") as f:
-            f.write(PACKAGE_MAIN_TEMPLATE)
-
-        # 3. Create a requirements.txt if not exists
-        req_file = os.path.join(output_dir, "requirements_native.txt")
-        with open(req_file, "w") as f:
-            f.write("d2p\n")
+        ensure_dir(output_dir)
+        output_parent, output_name = os.path.split(os.path.abspath(output_dir))
+
+        def ignore(directory, names):
+            # Skip VCS/cache dirs, and the output directory itself when
+            # copytree reaches its parent; no per-name path joins needed
+            ignored = IGNORED_NAMES.intersection(names)
+            if directory == output_parent and output_name in names:
+                ignored.add(output_name)
+            return ignored
+
+        # 1. Copy original source (excluding what we don't want).
+        # copytree creates the directories; file copies are I/O bound and
+        # run on a thread pool.
+        copy_file = shutil.copy2 if self.preserve_xattrs else fast_copy
+        max_workers = min(8, (os.cpu_count() or 1) * 2)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = []
+
+            def submit_copy(src, dst):
+                pending.append(executor.submit(copy_file, src, dst))
+                return dst
+
+            shutil.copytree(
+                self.source_dir,
+                output_dir,
+                ignore=ignore,
+                copy_function=submit_copy,
+                dirs_exist_ok=True,
+            )
+            for future in pending:
+                future.result()
+
+            # 2. Generate the entry point and requirements_native.txt once the
+            # copies are done (so they win over same-named source files)
+            writes = [
+                executor.submit(write_file, os.path.join(output_dir, name), data)
+                for name, data in GENERATED_FILES
+            ]
+            for write in writes:
+                write.result()
 
         print(f"Python package generated in {output_dir}")
         print("You can run it with: python run_native.py")
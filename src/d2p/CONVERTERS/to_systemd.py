@@ -16,8 +16,10 @@
 Converters for generating systemd service files from Docker Compose configurations.
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
 from jinja2 import Template
 from ..MODELS.orchestration_config import OrchestrationConfig
+from ..UTILS.file_copy import ensure_dir, write_file
 
 SYSTEMD_TEMPLATE = """
 [Unit]
@@ -38,12 +40,31 @@ Restart={{ restart_policy }}
 WantedBy=multi-user.target
 """
 
+# Separates units in the output of SYSTEMD_UNITS_TEMPLATE
+UNIT_SEPARATOR = "\x1e"
+
+# Renders every unit in one pass; each unit is followed by UNIT_SEPARATOR
+SYSTEMD_UNITS_TEMPLATE = (
+    "{% for unit in units %}"
+    "{% with name=unit.name, depends_on=unit.depends_on, user=unit.user,"
+    " working_dir=unit.working_dir, command=unit.command,"
+    " environment=unit.environment, restart_policy=unit.restart_policy %}"
+    + SYSTEMD_TEMPLATE
+    + "{%- endwith %}"
+    + UNIT_SEPARATOR
+    + "{% endfor %}"
+)
+
 
 class SystemdConverter:
     """
     Converts a Docker Compose configuration into systemd unit files.
     """
 
+    # Compiled once and shared by all converter instances
+    template = Template(SYSTEMD_TEMPLATE)
+    units_template = Template(SYSTEMD_UNITS_TEMPLATE)
+
     def __init__(self, config: OrchestrationConfig, base_dir: str = "."):
         """
         Initializes the systemd converter.
@@ -53,7 +74,6 @@ class SystemdConverter:
         """
         self.config = config
         self.base_dir = os.path.abspath(base_dir)
-        self.template = Template(SYSTEMD_TEMPLATE)
 
     def convert(self, output_dir: str = "systemd"):
         """
@@ -62,22 +82,37 @@ class SystemdConverter:
         :param output_dir: The directory where service files will be created.
         :return: The path to the output directory.
         """
-        os.makedirs(output_dir, exist_ok=True)
-
-        for name, svc in self.config.services.items():
-            content = self.template.render(
-                name=name,
-                depends_on=svc.depends_on,
-                user=svc.user,
-                working_dir=svc.working_dir,
-                base_dir=self.base_dir,
-                command=svc.entrypoint + svc.cmd,
-                environment=svc.environment,
-                restart_policy=svc.restart_policy.condition,
-            )
-
-            with open(os.path.join(output_dir, f"d2p-{name}.service"), "w") as f:
-                f.write(content)
+        ensure_dir(output_dir)
+
+        # Render every unit in a single template pass, then write them out
+        # concurrently
+        services = [
+            {
+                "name": name,
+                "depends_on": svc.depends_on,
+                "user": svc.user,
+                "working_dir": svc.working_dir,
+                "command": svc.entrypoint + svc.cmd,
+                "environment": svc.environment,
+                "restart_policy": svc.restart_policy.condition,
+            }
+            for name, svc in self.config.services.items()
+        ]
+        rendered = self.units_template.render(units=services, base_dir=self.base_dir)
+        contents = rendered.split(UNIT_SEPARATOR)[:-1]
+        if len(contents) != len(services):
+            # A value contained UNIT_SEPARATOR; render each unit on its own
+            contents = [
+                self.template.render(base_dir=self.base_dir, **svc) for svc in services
+            ]
+
+        units = {
+            os.path.join(output_dir, f"d2p-{svc['name']}.service"): content.encode()
+            for svc, content in zip(services, contents)
+        }
+
+        with ThreadPoolExecutor(max_workers=min(8, len(units) or 1)) as executor:
+            list(executor.map(write_file, units.keys(), units.values()))
 
         print(f"Systemd service files generated in {output_dir}")
         return output_dir
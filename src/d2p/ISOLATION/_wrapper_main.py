@@ -0,0 +1,121 @@
+# Copyright 2024 Michael Maillet, Damien Davison, Sacha Davison
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Isolation wrapper run by IsolatedRunner before exec'ing the real command.
+
+Run as a script, never imported from the d2p package, so the interpreter
+only loads os, sys and ctypes:
+
+    python -I -S -OO _wrapper_main.py NS_FLAGS HOSTNAME CWD CGROUP_PROCS \\
+        UID GID NO_NEW_PRIVS -- COMMAND...
+
+Empty strings mean "not set"; NO_NEW_PRIVS is "1" or "0". The environment
+is inherited from the spawning process unchanged.
+"""
+
+import ctypes
+import os
+import sys
+
+CLONE_NEWUTS = 0x04000000
+PR_SET_NO_NEW_PRIVS = 38
+
+
+def main(argv):
+    """
+    Join the cgroup and namespaces, drop privileges, then exec the command.
+
+    Privileged steps (cgroup attach, unshare, sethostname) run before the
+    UID/GID switch, and nothing here forks, so the command starts inside
+    the cgroup.
+
+    Args:
+        argv: The positional fields described above, "--", then the command.
+    """
+    ns_flags = int(argv[0])
+    hostname = argv[1]
+    cwd = argv[2]
+    cgroup_procs = argv[3]
+    uid = int(argv[4]) if argv[4] else None
+    gid = int(argv[5]) if argv[5] else None
+    no_new_privs = argv[6] == "1"
+    command = argv[8:]
+
+    # Join the cgroup
+    if cgroup_procs:
+        try:
+            fd = os.open(cgroup_procs, os.O_WRONLY)
+            try:
+                os.write(fd, b"%d" % os.getpid())
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Warning: Failed to join cgroup: {e}", file=sys.stderr)
+
+    # Try to apply namespaces
+    libc = None
+    try:
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        libc.unshare.argtypes = [ctypes.c_int]
+        libc.sethostname.argtypes = [ctypes.c_char_p, ctypes.c_size_t]
+        libc.prctl.argtypes = [ctypes.c_int] + [ctypes.c_ulong] * 4
+
+        # Create new namespaces
+        if ns_flags > 0:
+            ret = libc.unshare(ns_flags)
+            if ret != 0:
+                print("Warning: unshare failed", file=sys.stderr)
+
+        # Set hostname if provided and UTS namespace is used
+        if (ns_flags & CLONE_NEWUTS) and hostname:
+            hostname_bytes = hostname.encode("utf-8")
+            libc.sethostname(hostname_bytes, len(hostname_bytes))
+
+    except Exception as e:
+        print(f"Warning: Isolation setup failed: {e}", file=sys.stderr)
+
+    # Change directory
+    if cwd:
+        try:
+            os.chdir(cwd)
+        except Exception:
+            pass
+
+    # Set UID/GID if specified
+    if gid is not None:
+        try:
+            os.setgid(gid)
+        except PermissionError:
+            pass
+
+    if uid is not None:
+        try:
+            os.setuid(uid)
+        except PermissionError:
+            pass
+
+    # Set no_new_privileges (prevents setuid binaries from gaining privileges)
+    if no_new_privs and libc is not None:
+        try:
+            libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
+        except Exception:
+            pass
+
+    # Execute command
+    os.execvp(command[0], command)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -17,14 +17,153 @@ Linux cgroup v2 management for resource limits.
 Provides CPU, memory, and I/O resource constraints.
 """
 
+import atexit
+import functools
+import logging
 import os
+import re
 import sys
-from typing import Optional, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Union
 from dataclasses import dataclass
-from pathlib import Path
+from ..UTILS.file_copy import ensure_dir
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Names that _sanitize_name() would return unchanged (also rejects "..")
+_SAFE_NAME_RE = re.compile(r"(?!.*\.\.)[A-Za-z0-9_-][A-Za-z0-9_.-]*")
+
+# Multipliers for memory size suffixes ("512m", "1gb", ...)
+_MEMORY_UNITS = {"k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+# Decoded get_stats() keys for cpu.stat fields, filled on first sight
+_CPU_STAT_KEYS: Dict[bytes, str] = {}
+
+
+def _format_int(value: int) -> bytes:
+    """Format a plain integer limit."""
+    return b"%d" % value
+
+
+def _format_weight(value: int) -> bytes:
+    """Clamp a weight into the cgroup v2 range (1-10000)."""
+    return b"%d" % max(1, min(10000, value))
+
+
+def _format_io_weight(value: int) -> bytes:
+    """Format io.weight's default-device entry."""
+    return b"default " + _format_weight(value)
+
+
+@functools.lru_cache(maxsize=64)
+def _format_cpu_max(quota: int, period: int) -> bytes:
+    """Format cpu.max; services usually share a few quota/period pairs."""
+    return b"%d %d" % (quota, period)
+
+
+# Single-value limits: (ResourceLimits field, control file, formatter)
+_LIMIT_TABLE = (
+    ("cpu_shares", "cpu.weight", _format_weight),
+    ("memory_limit", "memory.max", _format_int),
+    ("memory_soft_limit", "memory.high", _format_int),
+    ("memory_swap_limit", "memory.swap.max", _format_int),
+    ("io_weight", "io.weight", _format_io_weight),
+    ("pids_limit", "pids.max", _format_int),
+)
+
+# Every ResourceLimits field that apply_limits() turns into a write
+_APPLIED_FIELDS = ("cpu_quota",) + tuple(attr for attr, _, _ in _LIMIT_TABLE)
+
+# Values that undo each control file written by apply_limits()
+_LIMIT_DEFAULTS = {
+    "cpu.weight": b"100",
+    "cpu.max": b"max",
+    "memory.max": b"max",
+    "memory.high": b"max",
+    "memory.swap.max": b"max",
+    "io.weight": b"default 100",
+    "pids.max": b"max",
+}
+
+
+class _CgroupPool:
+    """
+    Empty cgroup directories kept for reuse instead of being removed.
+
+    Restarting a service recreates a cgroup with the same path, so released
+    directories are keyed by path; re-acquiring one skips the mkdir and
+    controller setup. Whatever is still pooled is removed at exit.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._free: set = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, path: str) -> bool:
+        """Take a pooled directory; returns False if it has to be created."""
+        with self._lock:
+            if path in self._free:
+                self._free.discard(path)
+                return True
+            return False
+
+    def release(self, path: str) -> bool:
+        """Keep an empty directory for reuse; returns False if the pool is full."""
+        with self._lock:
+            if len(self._free) >= self.max_size:
+                return False
+            self._free.add(path)
+            return True
+
+    def drain(self) -> None:
+        """Remove every pooled directory."""
+        with self._lock:
+            paths = list(self._free)
+            self._free.clear()
+        for path in paths:
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+
+_cgroup_pool = _CgroupPool()
+atexit.register(_cgroup_pool.drain)
+
+# Controllers enabled for children of the d2p cgroup
+_SUBTREE_CONTROLLERS = b"+cpu +memory +io +pids"
+
+# Parent cgroups whose subtree_control was already written this process
+_subtree_enabled: set = set()
+_subtree_lock = threading.Lock()
+
+
+def _ensure_subtree_enabled(parent: str) -> None:
+    """
+    Enable the d2p controllers for a parent cgroup's children, once per process.
+
+    Every service cgroup shares the same parent, so only the first create()
+    writes its cgroup.subtree_control. Not all controllers may be available;
+    a failed write is not retried.
+    """
+    if parent in _subtree_enabled:
+        return
+    with _subtree_lock:
+        if parent in _subtree_enabled:
+            return
+        CgroupManager._write_sysfs(
+            f"{parent}/cgroup.subtree_control", _SUBTREE_CONTROLLERS
+        )
+        _subtree_enabled.add(parent)
+
+
+# dataclass(slots=True) needs Python 3.10+; 3.9 keeps a regular __dict__
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class ResourceLimits:
     """Resource limits for a container."""
 
@@ -53,6 +192,32 @@ class ResourceLimits:
         if self.cpus is not None and self.cpu_quota is None:
             self.cpu_quota = int(self.cpus * self.cpu_period)
 
+    @property
+    def has_limits(self) -> bool:
+        """Whether any limit that CgroupManager writes is set."""
+        return any(getattr(self, attr) is not None for attr in _APPLIED_FIELDS)
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class CgroupStats:
+    """Fixed-schema usage snapshot returned by CgroupManager.poll_stats()."""
+
+    cpu_usage_usec: int = 0
+    cpu_user_usec: int = 0
+    cpu_system_usec: int = 0
+    memory_current: int = 0
+    pids_current: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """Return the snapshot keyed like get_stats()."""
+        return {
+            "cpu.usage_usec": self.cpu_usage_usec,
+            "cpu.user_usec": self.cpu_user_usec,
+            "cpu.system_usec": self.cpu_system_usec,
+            "memory.current": self.memory_current,
+            "pids.current": self.pids_current,
+        }
+
 
 class CgroupManager:
     """
@@ -62,6 +227,27 @@ class CgroupManager:
 
     CGROUP_V2_ROOT = "/sys/fs/cgroup"
 
+    # Large enough for any of the polled stat files in one read
+    STAT_READ_SIZE = 8192
+
+    # Batch helpers handle this many cgroups or fewer inline
+    BATCH_INLINE_LIMIT = 8
+
+    # Control files resolved once per cgroup (see _set_cgroup_path)
+    CONTROL_FILES = (
+        "cpu.weight",
+        "cpu.max",
+        "cpu.stat",
+        "memory.max",
+        "memory.high",
+        "memory.swap.max",
+        "memory.current",
+        "io.weight",
+        "pids.max",
+        "pids.current",
+        "cgroup.procs",
+    )
+
     def __init__(self, name: str, limits: Optional[ResourceLimits] = None):
         """
         Initialize the cgroup manager.
@@ -73,7 +259,9 @@ class CgroupManager:
         self.name = self._sanitize_name(name)
         self.limits = limits or ResourceLimits()
         self._is_linux = sys.platform.startswith("linux")
-        self._cgroup_path: Optional[Path] = None
+        self._cgroup_path: Optional[str] = None
+        self._paths: Dict[str, str] = {}
+        self._stat_fds: Dict[str, int] = {}
         self._is_v2 = False
         self._initialized = False
 
@@ -83,6 +271,8 @@ class CgroupManager:
     @staticmethod
     def _sanitize_name(name: str) -> str:
         """Sanitize a name for use as a cgroup path component."""
+        if _SAFE_NAME_RE.fullmatch(name):
+            return name
         # Replace problematic characters
         sanitized = name.replace("/", "_").replace("..", "_")
         # Remove leading dots
@@ -90,24 +280,95 @@ class CgroupManager:
             sanitized = sanitized[1:]
         return sanitized or "container"
 
+    @staticmethod
+    def _write_sysfs(path: str, data: bytes) -> bool:
+        """
+        Write a single value to a cgroup/sysfs control file.
+
+        Uses a raw O_WRONLY fd instead of the buffered text I/O stack; a
+        missing file surfaces as ENOENT like any other write failure.
+
+        Args:
+            path: Control file to write.
+            data: Encoded value to write.
+
+        Returns:
+            True if the write succeeded, False otherwise.
+        """
+        try:
+            fd = os.open(path, os.O_WRONLY)
+        except OSError:
+            return False
+        try:
+            os.write(fd, data)
+            return True
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
+
+    def _set_cgroup_path(self, path: Union[str, os.PathLike]) -> None:
+        """Set the cgroup directory and resolve its control file paths."""
+        self._close_stat_fds()
+        self._cgroup_path = base = os.fspath(path)
+        self._paths = {name: f"{base}/{name}" for name in self.CONTROL_FILES}
+
+    def _read_stat(self, name: str) -> bytes:
+        """
+        Read a stat control file through a cached read-only fd.
+
+        The fd is opened on first use and re-read with pread(), so polling
+        get_stats() costs one syscall per file instead of open/read/close.
+
+        Args:
+            name: Control file name (a key of CONTROL_FILES).
+
+        Returns:
+            The raw file contents.
+
+        Raises:
+            OSError: If the file cannot be opened or read.
+        """
+        fd = self._stat_fds.get(name)
+        if fd is None:
+            fd = os.open(self._paths[name], os.O_RDONLY)
+            self._stat_fds[name] = fd
+        return os.pread(fd, self.STAT_READ_SIZE, 0)
+
+    def _close_stat_fds(self) -> None:
+        """Close any fds cached by _read_stat."""
+        for fd in self._stat_fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._stat_fds.clear()
+
     def _detect_cgroup_version(self) -> None:
         """Detect which cgroup version is available."""
-        # Check for cgroup v2 (unified hierarchy)
-        cgroup_v2_path = Path(self.CGROUP_V2_ROOT)
-        if cgroup_v2_path.exists():
-            controllers_path = cgroup_v2_path / "cgroup.controllers"
-            if controllers_path.exists():
-                self._is_v2 = True
-                return
+        # Check for cgroup v2 (unified hierarchy); one stat covers the root too
+        try:
+            os.stat(f"{self.CGROUP_V2_ROOT}/cgroup.controllers")
+            self._is_v2 = True
+            return
+        except OSError:
+            pass
 
         # Could add cgroup v1 support here if needed
-        print("Warning: cgroup v2 not detected, resource limits will not be enforced")
+        logger.warning("cgroup v2 not detected, resource limits will not be enforced")
 
     @property
     def is_available(self) -> bool:
         """Check if cgroup management is available."""
         return self._is_linux and self._is_v2
 
+    @property
+    def procs_path(self) -> Optional[str]:
+        """Path of this cgroup's cgroup.procs file, or None before create()."""
+        if not self._initialized or not self._cgroup_path:
+            return None
+        return self._paths["cgroup.procs"]
+
     def create(self) -> bool:
         """
         Create a cgroup for this container.
@@ -119,192 +380,119 @@ class CgroupManager:
             return False
 
         # Create under d2p namespace
-        cgroup_base = Path(self.CGROUP_V2_ROOT) / "d2p"
-        if not cgroup_base.exists():
-            try:
-                cgroup_base.mkdir(parents=True, exist_ok=True)
-            except PermissionError:
-                print(f"Warning: No permission to create cgroup at {cgroup_base}")
-                return False
+        cgroup_base = f"{self.CGROUP_V2_ROOT}/d2p"
+        cgroup_path = f"{cgroup_base}/{self.name}"
+        self._set_cgroup_path(cgroup_path)
 
-        self._cgroup_path = cgroup_base / self.name
+        # A pooled directory already exists with controllers enabled
+        if _cgroup_pool.acquire(cgroup_path):
+            self._initialized = True
+            return True
 
         try:
-            if not self._cgroup_path.exists():
-                self._cgroup_path.mkdir(parents=True, exist_ok=True)
+            ensure_dir(cgroup_base)
+        except PermissionError:
+            logger.warning("No permission to create cgroup at %s", cgroup_base)
+            return False
+
+        # Enable controllers for the children of the d2p cgroup
+        _ensure_subtree_enabled(cgroup_base)
 
-            # Enable controllers
-            self._enable_controllers()
+        try:
+            ensure_dir(cgroup_path)
 
             self._initialized = True
             return True
 
         except PermissionError:
-            print(f"Warning: No permission to create cgroup at {self._cgroup_path}")
+            logger.warning("No permission to create cgroup at %s", cgroup_path)
             return False
         except Exception as e:
-            print(f"Warning: Failed to create cgroup: {e}")
+            logger.warning("Failed to create cgroup: %s", e)
             return False
 
-    def _enable_controllers(self) -> None:
-        """Enable required controllers for the cgroup."""
-        if not self._cgroup_path or not self._cgroup_path.exists():
-            return
-
-        parent_path = self._cgroup_path.parent
-        subtree_control = parent_path / "cgroup.subtree_control"
+    @classmethod
+    def create_batch(
+        cls,
+        specs: Sequence[Tuple[str, Optional[ResourceLimits]]],
+        max_workers: int = 32,
+    ) -> List["CgroupManager"]:
+        """
+        Create and apply limits for many cgroups at once.
 
-        if subtree_control.exists():
-            try:
-                # Enable common controllers
-                controllers = ["+cpu", "+memory", "+io", "+pids"]
-                with open(subtree_control, "w") as f:
-                    f.write(" ".join(controllers))
-            except (PermissionError, OSError):
-                # Not all controllers may be available
-                pass
+        The per-cgroup work is independent mkdir/write syscalls, so past
+        BATCH_INLINE_LIMIT specs it is spread over a thread pool.
 
-    def apply_limits(self) -> bool:
-        """
-        Apply resource limits to the cgroup.
+        Args:
+            specs: (name, limits) pairs, one per cgroup.
+            max_workers: Upper bound on worker threads.
 
         Returns:
-            True if any limits were applied, False otherwise.
+            One manager per spec, in order. Check each manager's state
+            rather than assuming creation succeeded.
         """
-        if not self._initialized or not self._cgroup_path:
-            return False
-
-        applied = False
-
-        # Apply CPU limits
-        applied |= self._apply_cpu_limits()
-
-        # Apply memory limits
-        applied |= self._apply_memory_limits()
 
-        # Apply I/O limits
-        applied |= self._apply_io_limits()
+        managers = [cls(*spec) for spec in specs]
+        cls.provision_batch(managers, max_workers)
+        return managers
 
-        # Apply PIDs limit
-        applied |= self._apply_pids_limit()
+    @classmethod
+    def provision_batch(
+        cls, managers: Sequence["CgroupManager"], max_workers: int = 32
+    ) -> List[bool]:
+        """
+        Create and apply limits for existing managers at once.
 
-        return applied
+        Args:
+            managers: Managers whose cgroups should be created.
+            max_workers: Upper bound on worker threads.
 
-    def _apply_cpu_limits(self) -> bool:
-        """Apply CPU resource limits."""
-        if not self._cgroup_path:
-            return False
+        Returns:
+            Whether each manager's cgroup was created, in order.
+        """
 
-        applied = False
+        def provision(manager: "CgroupManager") -> bool:
+            if not manager.create():
+                return False
+            manager.apply_limits()
+            return True
 
-        # CPU weight (shares)
-        if self.limits.cpu_shares is not None:
-            weight_path = self._cgroup_path / "cpu.weight"
-            if weight_path.exists():
-                try:
-                    # Convert from shares (1-1024) to weight (1-10000)
-                    weight = max(1, min(10000, self.limits.cpu_shares))
-                    with open(weight_path, "w") as f:
-                        f.write(str(weight))
-                    applied = True
-                except (PermissionError, OSError):
-                    pass
-
-        # CPU quota
-        if self.limits.cpu_quota is not None or self.limits.cpus is not None:
-            max_path = self._cgroup_path / "cpu.max"
-            if max_path.exists():
-                try:
-                    quota = self.limits.cpu_quota
-                    if quota is None and self.limits.cpus is not None:
-                        quota = int(self.limits.cpus * self.limits.cpu_period)
-                    with open(max_path, "w") as f:
-                        f.write(f"{quota} {self.limits.cpu_period}")
-                    applied = True
-                except (PermissionError, OSError):
-                    pass
+        if len(managers) <= cls.BATCH_INLINE_LIMIT:
+            return [provision(manager) for manager in managers]
+        workers = min(max_workers, len(managers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(provision, managers))
 
-        return applied
+    def apply_limits(self) -> bool:
+        """
+        Apply resource limits to the cgroup.
 
-    def _apply_memory_limits(self) -> bool:
-        """Apply memory resource limits."""
-        if not self._cgroup_path:
+        Returns:
+            True if any limits were applied, False otherwise.
+        """
+        if not self._initialized or not self._cgroup_path:
             return False
 
-        applied = False
-
-        # Memory max
-        if self.limits.memory_limit is not None:
-            max_path = self._cgroup_path / "memory.max"
-            if max_path.exists():
-                try:
-                    with open(max_path, "w") as f:
-                        f.write(str(self.limits.memory_limit))
-                    applied = True
-                except (PermissionError, OSError):
-                    pass
-
-        # Memory high (soft limit)
-        if self.limits.memory_soft_limit is not None:
-            high_path = self._cgroup_path / "memory.high"
-            if high_path.exists():
-                try:
-                    with open(high_path, "w") as f:
-                        f.write(str(self.limits.memory_soft_limit))
-                    applied = True
-                except (PermissionError, OSError):
-                    pass
-
-        # Memory swap
-        if self.limits.memory_swap_limit is not None:
-            swap_path = self._cgroup_path / "memory.swap.max"
-            if swap_path.exists():
-                try:
-                    with open(swap_path, "w") as f:
-                        f.write(str(self.limits.memory_swap_limit))
-                    applied = True
-                except (PermissionError, OSError):
-                    pass
-
-        return applied
-
-    def _apply_io_limits(self) -> bool:
-        """Apply I/O resource limits."""
-        if not self._cgroup_path:
+        limits = self.limits
+        if not limits.has_limits:
             return False
 
+        paths = self._paths
         applied = False
 
-        # I/O weight
-        if self.limits.io_weight is not None:
-            weight_path = self._cgroup_path / "io.weight"
-            if weight_path.exists():
-                try:
-                    weight = max(1, min(10000, self.limits.io_weight))
-                    with open(weight_path, "w") as f:
-                        f.write(f"default {weight}")
-                    applied = True
-                except (PermissionError, OSError):
-                    pass
-
-        return applied
-
-    def _apply_pids_limit(self) -> bool:
-        """Apply PIDs limit."""
-        if not self._cgroup_path:
-            return False
+        # CPU quota is the only limit built from two fields; cpus was already
+        # folded into cpu_quota by ResourceLimits.__post_init__
+        if limits.cpu_quota is not None:
+            applied |= self._write_sysfs(
+                paths["cpu.max"], _format_cpu_max(limits.cpu_quota, limits.cpu_period)
+            )
 
-        if self.limits.pids_limit is not None:
-            max_path = self._cgroup_path / "pids.max"
-            if max_path.exists():
-                try:
-                    with open(max_path, "w") as f:
-                        f.write(str(self.limits.pids_limit))
-                    return True
-                except (PermissionError, OSError):
-                    pass
+        for attr, control_file, format_value in _LIMIT_TABLE:
+            value = getattr(limits, attr)
+            if value is not None:
+                applied |= self._write_sysfs(paths[control_file], format_value(value))
 
-        return False
+        return applied
 
     def add_process(self, pid: int) -> bool:
         """
@@ -319,13 +507,15 @@ class CgroupManager:
         if not self._initialized or not self._cgroup_path:
             return False
 
-        procs_path = self._cgroup_path / "cgroup.procs"
         try:
-            with open(procs_path, "w") as f:
-                f.write(str(pid))
+            fd = os.open(self._paths["cgroup.procs"], os.O_WRONLY)
+            try:
+                os.write(fd, b"%d" % pid)
+            finally:
+                os.close(fd)
             return True
         except (PermissionError, OSError) as e:
-            print(f"Warning: Failed to add process {pid} to cgroup: {e}")
+            logger.warning("Failed to add process %s to cgroup: %s", pid, e)
             return False
 
     def get_stats(self) -> dict:
@@ -341,37 +531,128 @@ class CgroupManager:
             return stats
 
         # CPU stats
-        cpu_stat_path = self._cgroup_path / "cpu.stat"
-        if cpu_stat_path.exists():
-            try:
-                with open(cpu_stat_path, "r") as f:
-                    for line in f:
-                        parts = line.strip().split()
-                        if len(parts) == 2:
-                            stats[f"cpu.{parts[0]}"] = int(parts[1])
-            except (PermissionError, OSError):
-                pass
+        # Missing control files just fail to open
+        try:
+            # cpu.stat is "key value" lines; split the whole buffer at once
+            tokens = self._read_stat("cpu.stat").split()
+            keys = _CPU_STAT_KEYS
+            for key, value in zip(tokens[0::2], tokens[1::2]):
+                name = keys.get(key)
+                if name is None:
+                    name = keys[key] = "cpu." + key.decode("ascii")
+                stats[name] = int(value)
+        except (PermissionError, OSError, ValueError):
+            pass
 
         # Memory stats
-        memory_current_path = self._cgroup_path / "memory.current"
-        if memory_current_path.exists():
-            try:
-                with open(memory_current_path, "r") as f:
-                    stats["memory.current"] = int(f.read().strip())
-            except (PermissionError, OSError, ValueError):
-                pass
+        try:
+            stats["memory.current"] = int(self._read_stat("memory.current"))
+        except (PermissionError, OSError, ValueError):
+            pass
 
         # PIDs count
-        pids_current_path = self._cgroup_path / "pids.current"
-        if pids_current_path.exists():
-            try:
-                with open(pids_current_path, "r") as f:
-                    stats["pids.current"] = int(f.read().strip())
-            except (PermissionError, OSError, ValueError):
-                pass
+        try:
+            stats["pids.current"] = int(self._read_stat("pids.current"))
+        except (PermissionError, OSError, ValueError):
+            pass
 
         return stats
 
+    @classmethod
+    def batch_get_stats(
+        cls, managers: Sequence["CgroupManager"], max_workers: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Get stats for many cgroups in one call.
+
+        Each manager reads through its cached fds; past BATCH_INLINE_LIMIT
+        managers the reads are spread over a thread pool, since pread()
+        releases the GIL while the kernel renders the stat files.
+
+        Args:
+            managers: Managers to poll.
+            max_workers: Upper bound on polling threads.
+
+        Returns:
+            One get_stats() dict per manager, in order.
+        """
+        if len(managers) <= cls.BATCH_INLINE_LIMIT:
+            return [manager.get_stats() for manager in managers]
+        workers = min(max_workers, len(managers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(cls.get_stats, managers))
+
+    def poll_stats(self) -> CgroupStats:
+        """
+        Get the core usage counters as a CgroupStats.
+
+        Cheaper than get_stats() for polling loops: only the fixed fields are
+        parsed and no dict is built. Unreadable counters are left at 0.
+
+        Returns:
+            A CgroupStats snapshot.
+        """
+        stats = CgroupStats()
+
+        if not self._initialized or not self._cgroup_path:
+            return stats
+
+        try:
+            tokens = self._read_stat("cpu.stat").split()
+            for key, value in zip(tokens[0::2], tokens[1::2]):
+                if key == b"usage_usec":
+                    stats.cpu_usage_usec = int(value)
+                elif key == b"user_usec":
+                    stats.cpu_user_usec = int(value)
+                elif key == b"system_usec":
+                    stats.cpu_system_usec = int(value)
+        except (PermissionError, OSError, ValueError):
+            pass
+
+        try:
+            stats.memory_current = int(self._read_stat("memory.current"))
+        except (PermissionError, OSError, ValueError):
+            pass
+
+        try:
+            stats.pids_current = int(self._read_stat("pids.current"))
+        except (PermissionError, OSError, ValueError):
+            pass
+
+        return stats
+
+    def _reset_limits(self) -> bool:
+        """
+        Return an empty cgroup to default limits so it can be pooled.
+
+        Only the control files apply_limits() may have written are reset.
+
+        Returns:
+            True if the cgroup is empty and every reset succeeded.
+        """
+        try:
+            fd = os.open(self._paths["cgroup.procs"], os.O_RDONLY)
+            try:
+                if os.read(fd, 1):
+                    return False
+            finally:
+                os.close(fd)
+        except OSError:
+            return False
+
+        limits = self.limits
+        written = [
+            control_file
+            for attr, control_file, _ in _LIMIT_TABLE
+            if getattr(limits, attr) is not None
+        ]
+        if limits.cpu_quota is not None:
+            written.append("cpu.max")
+        return all(
+            self._write_sysfs(self._paths[control_file], _LIMIT_DEFAULTS[control_file])
+            for control_file in written
+        )
+
     def cleanup(self) -> bool:
         """
         Remove the cgroup.
@@ -382,14 +663,21 @@ class CgroupManager:
         if not self._initialized or not self._cgroup_path:
             return True
 
+        self._close_stat_fds()
+        if self._reset_limits() and _cgroup_pool.release(self._cgroup_path):
+            self._initialized = False
+            return True
+
         try:
             # Cgroup directories can only be removed when empty
-            if self._cgroup_path.exists():
-                self._cgroup_path.rmdir()
+            try:
+                os.rmdir(self._cgroup_path)
+            except FileNotFoundError:
+                pass
             self._initialized = False
             return True
         except OSError as e:
-            print(f"Warning: Failed to remove cgroup: {e}")
+            logger.warning("Failed to remove cgroup: %s", e)
             return False
 
     @staticmethod
@@ -407,28 +695,25 @@ class CgroupManager:
             return None
 
         memory_str = memory_str.strip().lower()
+        if not memory_str:
+            return None
 
-        suffixes = {
-            "b": 1,
-            "k": 1024,
-            "kb": 1024,
-            "m": 1024**2,
-            "mb": 1024**2,
-            "g": 1024**3,
-            "gb": 1024**3,
-            "t": 1024**4,
-            "tb": 1024**4,
-        }
-
-        for suffix, multiplier in sorted(suffixes.items(), key=lambda x: -len(x[0])):
-            if memory_str.endswith(suffix):
-                try:
-                    value = float(memory_str[: -len(suffix)])
-                    return int(value * multiplier)
-                except ValueError:
-                    return None
+        # Suffix is "<unit>", "<unit>b" or "b"; inspect the last two chars only
+        end = len(memory_str)
+        multiplier = 1
+        if memory_str[-1] == "b":
+            end -= 1
+        if end and memory_str[end - 1] in _MEMORY_UNITS:
+            end -= 1
+            multiplier = _MEMORY_UNITS[memory_str[end]]
+        elif end == len(memory_str):
+            # No suffix at all
+            try:
+                return int(memory_str)
+            except ValueError:
+                return None
 
         try:
-            return int(memory_str)
+            return int(float(memory_str[:end]) * multiplier)
         except ValueError:
             return None
@@ -17,16 +17,509 @@ Filesystem isolation using chroot, pivot_root, and bind mounts.
 Provides container-like filesystem views.
 """
 
+import ctypes
+import errno
+import functools
+import logging
+import mmap
 import os
+import platform
+import stat
+import struct
 import sys
 import shutil
 import tempfile
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Dict, List, Sequence, Set, Tuple, Union
 from dataclasses import dataclass, field
 from pathlib import Path
+from ..UTILS.file_copy import ensure_dir, fast_copy, write_file
+
+logger = logging.getLogger(__name__)
+
+# Path arguments accepted by the mount methods; all go through os.fsencode
+_PathArg = Union[str, bytes, "os.PathLike[str]", "os.PathLike[bytes]"]
+
+# Character devices created in /dev: (name, major, minor)
+_DEVICES = (
+    ("null", 1, 3),
+    ("zero", 1, 5),
+    ("random", 1, 8),
+    ("urandom", 1, 9),
+    ("tty", 5, 0),
+)
+
+# Symlinks created in /dev: (name, target)
+_DEVICE_LINKS = (
+    ("stdin", "/proc/self/fd/0"),
+    ("stdout", "/proc/self/fd/1"),
+    ("stderr", "/proc/self/fd/2"),
+)
+
+# Files seeded into /etc: (name, content)
+_ETC_FILES = (
+    (
+        "passwd",
+        b"root:x:0:0:root:/root:/bin/sh\n"
+        b"nobody:x:65534:65534:nobody:/:/sbin/nologin\n",
+    ),
+    ("group", b"root:x:0:\nnobody:x:65534:\n"),
+    ("hosts", b"127.0.0.1 localhost\n::1 localhost\n"),
+)
+
+# resolv.conf used when the host has none
+_DEFAULT_RESOLV_CONF = b"nameserver 8.8.8.8\nnameserver 8.8.4.4\n"
+
+
+def _create_file(path: str, data: bytes) -> bool:
+    """
+    Create a file with the given content unless it already exists.
+
+    O_EXCL makes the existence check part of the open, so there is no
+    separate stat.
+
+    Args:
+        path: File to create.
+        data: Content to write.
+
+    Returns:
+        True if the file was created, False if it already existed.
+    """
+    try:
+        write_file(path, data, exclusive=True)
+    except FileExistsError:
+        return False
+    return True
+
+
+# mount(2) flags and umount2(2) flags from <sys/mount.h>
+_MS_RDONLY = 1
+_MS_REMOUNT = 32
+_MS_BIND = 4096
+_MS_REC = 16384
+_MNT_DETACH = 2
+
+# pivot_root(2) syscall number per architecture; None where unknown
+_SYS_PIVOT_ROOT = {
+    "x86_64": 155,
+    "i386": 217,
+    "i686": 217,
+    "aarch64": 41,
+    "riscv64": 41,
+    "loongarch64": 41,
+    "armv7l": 218,
+    "ppc64le": 203,
+    "ppc64": 203,
+    "s390x": 217,
+}.get(platform.machine())
+
+
+class _Libc:
+    """libc mount entry points with argtypes declared once."""
+
+    def __init__(self):
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+
+        self.mount = libc.mount
+        self.mount.argtypes = [
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_char_p,
+            ctypes.c_ulong,
+            ctypes.c_void_p,
+        ]
+        self.mount.restype = ctypes.c_int
+
+        self.umount2 = libc.umount2
+        self.umount2.argtypes = [ctypes.c_char_p, ctypes.c_int]
+        self.umount2.restype = ctypes.c_int
+
+        # Only used for pivot_root(new_root, put_old)
+        self.syscall = libc.syscall
+        self.syscall.argtypes = [ctypes.c_long, ctypes.c_char_p, ctypes.c_char_p]
+        self.syscall.restype = ctypes.c_long
+
+
+@functools.lru_cache(maxsize=1)
+def _libc() -> _Libc:
+    """Load libc on first use; raises OSError where it isn't available."""
+    return _Libc()
+
+
+def _mount_point_missing(ret: int) -> bool:
+    """Check whether a mount() call failed because its target doesn't exist."""
+    return ret != 0 and ctypes.get_errno() == errno.ENOENT
+
 
+def _create_mount_point(target: bytes, is_dir: bool) -> None:
+    """Create a directory mount point, or an empty file for a file bind mount."""
+    if is_dir:
+        ensure_dir(target)
+    else:
+        ensure_dir(os.path.dirname(target))
+        os.close(os.open(target, os.O_WRONLY | os.O_CREAT, 0o666))
 
-@dataclass
+
+def _create_mount_points(mount_points: List[Tuple[bytes, bool]]) -> None:
+    """
+    Create the mount points for a list of mounts in one sweep.
+
+    Directories are created in sorted order, so parents come before their
+    children and each shared parent is made once. Targets beneath an
+    earlier mount are skipped: they must be created inside that mount once
+    it is in place, which the mount methods do themselves.
+
+    Args:
+        mount_points: (target, is_dir) pairs in the order they'll be mounted.
+    """
+    dirs = set()
+    files = []
+    mounted: List[bytes] = []
+    for target, is_dir in mount_points:
+        if not any(target.startswith(prefix) for prefix in mounted):
+            if is_dir:
+                dirs.add(target)
+            else:
+                dirs.add(os.path.dirname(target))
+                files.append(target)
+        mounted.append(target.rstrip(b"/") + b"/")
+
+    for path in sorted(dirs):
+        ensure_dir(path)
+    for path in files:
+        os.close(os.open(path, os.O_WRONLY | os.O_CREAT, 0o666))
+
+
+# Minimal rootfs skeleton, parents listed before their children
+_ROOTFS_DIRS = (
+    "bin",
+    "dev",
+    "etc",
+    "home",
+    "lib",
+    "lib64",
+    "proc",
+    "root",
+    "run",
+    "sbin",
+    "sys",
+    "tmp",
+    "usr",
+    "var",
+    "usr/bin",
+    "usr/lib",
+    "usr/lib64",
+    "usr/sbin",
+    "var/cache",
+    "var/lib",
+    "var/log",
+    "var/run",
+    "var/tmp",
+)
+
+
+# dataclass(slots=True) needs Python 3.10+
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+# ELF constants used to find a binary's shared library dependencies
+_ELF_MAGIC = b"\x7fELF"
+_PT_LOAD = 1
+_PT_DYNAMIC = 2
+_PT_INTERP = 3
+_DT_NULL = 0
+_DT_NEEDED = 1
+_DT_STRTAB = 5
+_DT_RPATH = 15
+_DT_RUNPATH = 29
+
+# Directories searched when a library is not in ld.so.cache
+_DEFAULT_LIB_DIRS = ("/lib", "/lib64", "/usr/lib", "/usr/lib64")
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class _ElfDeps:
+    """Dynamic linking information read from an ELF file."""
+
+    abi: bytes  # EI_CLASS, EI_DATA and e_machine; libraries must match
+    interp: Optional[str] = None  # PT_INTERP, the dynamic loader
+    needed: List[str] = field(default_factory=list)  # DT_NEEDED sonames
+    search_dirs: List[str] = field(default_factory=list)  # DT_RPATH/DT_RUNPATH
+
+
+def _elf_abi(header: bytes) -> Optional[bytes]:
+    """Return the ABI key of an ELF header, or None if it isn't ELF."""
+    if len(header) < 20 or header[:4] != _ELF_MAGIC:
+        return None
+    return header[4:6] + header[18:20]
+
+
+def _read_needed(path: str) -> Optional[_ElfDeps]:
+    """
+    Read the dynamic loader and DT_NEEDED entries of an ELF file.
+
+    Walks the program headers for PT_INTERP and PT_DYNAMIC, then reads
+    the needed sonames from the dynamic string table. This is what ldd
+    reports, without starting a process.
+
+    Args:
+        path: ELF binary or shared library.
+
+    Returns:
+        The dependencies, or None if the file is not a readable ELF file.
+        Static binaries have no interp and an empty needed list.
+    """
+    try:
+        with (
+            open(path, "rb") as f,
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data,
+        ):
+            return _parse_elf(data)
+    except (OSError, ValueError, struct.error):
+        # ValueError: empty file; struct.error: truncated headers
+        return None
+
+
+def _parse_elf(data: mmap.mmap) -> Optional[_ElfDeps]:
+    """Parse the ELF image mapped in data; see _read_needed."""
+    abi = _elf_abi(data[:20])
+    if abi is None:
+        return None
+
+    is_64 = data[4] == 2
+    endian = "<" if data[5] == 1 else ">"
+    if is_64:
+        phoff, phentsize, phnum = (
+            struct.unpack_from(endian + "Q", data, 32)[0],
+            *struct.unpack_from(endian + "HH", data, 54),
+        )
+        phdr = struct.Struct(endian + "II5Q")
+        dyn = struct.Struct(endian + "qQ")
+    else:
+        phoff, phentsize, phnum = (
+            struct.unpack_from(endian + "I", data, 28)[0],
+            *struct.unpack_from(endian + "HH", data, 42),
+        )
+        phdr = struct.Struct(endian + "8I")
+        dyn = struct.Struct(endian + "iI")
+
+    deps = _ElfDeps(abi)
+    loads = []
+    dynamic = None
+    for i in range(phnum):
+        fields = phdr.unpack_from(data, phoff + i * phentsize)
+        if is_64:
+            p_type, _, p_offset, p_vaddr, _, p_filesz, _ = fields
+        else:
+            p_type, p_offset, p_vaddr, _, p_filesz = fields[:5]
+        if p_type == _PT_LOAD:
+            loads.append((p_vaddr, p_offset, p_filesz))
+        elif p_type == _PT_DYNAMIC:
+            dynamic = (p_offset, p_filesz)
+        elif p_type == _PT_INTERP:
+            end = p_offset + p_filesz
+            deps.interp = os.fsdecode(data[p_offset:end].split(b"\0", 1)[0])
+
+    if dynamic is None:
+        return deps
+
+    strtab = None
+    needed = []
+    search = []
+    offset, size = dynamic
+    for pos in range(offset, offset + size, dyn.size):
+        tag, val = dyn.unpack_from(data, pos)
+        if tag == _DT_NULL:
+            break
+        if tag == _DT_STRTAB:
+            strtab = val
+        elif tag == _DT_NEEDED:
+            needed.append(val)
+        elif tag in (_DT_RPATH, _DT_RUNPATH):
+            search.append(val)
+
+    if strtab is None:
+        return deps
+
+    # DT_STRTAB holds a virtual address; map it back to a file offset
+    for vaddr, file_offset, filesz in loads:
+        if vaddr <= strtab < vaddr + filesz:
+            strtab = strtab - vaddr + file_offset
+            break
+    else:
+        return deps
+
+    def string_at(index: int) -> str:
+        start = strtab + index
+        return os.fsdecode(data[start : data.find(b"\0", start)])
+
+    deps.needed = [string_at(index) for index in needed]
+    for index in search:
+        deps.search_dirs.extend(d for d in string_at(index).split(":") if d)
+    return deps
+
+
+@functools.lru_cache(maxsize=1)
+def _ld_cache() -> Dict[str, Tuple[str, ...]]:
+    """
+    Parse /etc/ld.so.cache into a soname to paths mapping.
+
+    Only the glibc "new" format is understood; an unreadable or unknown
+    cache yields an empty mapping and lookups fall back to
+    _DEFAULT_LIB_DIRS. A soname may map to several paths, one per
+    architecture, in cache order.
+    """
+    magic = b"glibc-ld.so.cache1.1"
+    try:
+        with open("/etc/ld.so.cache", "rb") as f:
+            data = f.read()
+    except OSError:
+        return {}
+
+    # The new format may follow an old-format block in compat caches;
+    # its string offsets are relative to its own header
+    base = data.find(magic)
+    if base < 0:
+        return {}
+
+    cache: Dict[str, List[str]] = {}
+    try:
+        (nlibs,) = struct.unpack_from("<I", data, base + len(magic))
+        entry = struct.Struct("<iIIIQ")
+        for i in range(nlibs):
+            _, key, value, _, _ = entry.unpack_from(data, base + 48 + i * entry.size)
+            name = data[base + key : data.index(b"\0", base + key)]
+            path = data[base + value : data.index(b"\0", base + value)]
+            cache.setdefault(os.fsdecode(name), []).append(os.fsdecode(path))
+    except (struct.error, ValueError):
+        return {}
+    return {name: tuple(paths) for name, paths in cache.items()}
+
+
+def _matches_abi(path: str, abi: bytes) -> bool:
+    """Check that the ELF file at path can be loaded next to an abi binary."""
+    try:
+        with open(path, "rb") as f:
+            return _elf_abi(f.read(20)) == abi
+    except OSError:
+        return False
+
+
+def _resolve_library(name: str, deps: _ElfDeps, origin: str) -> Optional[str]:
+    """
+    Find the file the dynamic loader would use for a DT_NEEDED entry.
+
+    Searches, in order: the object's own rpath/runpath (with $ORIGIN
+    expanded), LD_LIBRARY_PATH, ld.so.cache and _DEFAULT_LIB_DIRS.
+    Candidates built for another architecture are skipped.
+
+    Args:
+        name: Soname from DT_NEEDED.
+        deps: The object that needs it.
+        origin: Directory of that object, for $ORIGIN.
+
+    Returns:
+        Path to the library, or None if it can't be found.
+    """
+    if "/" in name:
+        return name if os.path.exists(name) else None
+
+    dirs = [
+        d.replace("${ORIGIN}", origin).replace("$ORIGIN", origin)
+        for d in deps.search_dirs
+    ]
+    dirs.extend(d for d in os.environ.get("LD_LIBRARY_PATH", "").split(":") if d)
+    candidates = [os.path.join(d, name) for d in dirs]
+    candidates.extend(_ld_cache().get(name, ()))
+    candidates.extend(os.path.join(d, name) for d in _DEFAULT_LIB_DIRS)
+
+    for candidate in candidates:
+        if _matches_abi(candidate, deps.abi):
+            return candidate
+    return None
+
+
+@functools.lru_cache(maxsize=256)
+def _which(name: str, search_path: Optional[str]) -> Optional[str]:
+    """shutil.which, memoized per name and PATH value."""
+    return shutil.which(name, path=search_path)
+
+
+def _resolve_binary(binary: str) -> Optional[str]:
+    """
+    Resolve a binary given by path or by name on PATH.
+
+    Paths are checked on every call; PATH lookups are cached, keyed on
+    the current PATH so a changed environment is not served stale results.
+
+    Args:
+        binary: Path to a binary, or a bare command name.
+
+    Returns:
+        Path to the binary, or None if it doesn't exist.
+    """
+    if os.sep in binary:
+        return binary if os.path.exists(binary) else None
+    if os.path.exists(binary):
+        # A file in the working directory, as before
+        return binary
+    return _which(binary, os.environ.get("PATH"))
+
+
+def _library_closure(binaries: List[str]) -> Set[str]:
+    """
+    Collect the shared libraries and loaders a set of binaries needs.
+
+    Args:
+        binaries: Resolved binary paths.
+
+    Returns:
+        Paths of every library reachable through DT_NEEDED, plus each
+        object's PT_INTERP; all exist on the host. Non-ELF and static
+        binaries contribute nothing.
+    """
+    libs: Set[str] = set()
+    pending = list(binaries)
+    seen = set(pending)
+    while pending:
+        path = pending.pop()
+        deps = _read_needed(path)
+        if deps is None:
+            continue
+        if deps.interp and deps.interp not in libs and os.path.exists(deps.interp):
+            libs.add(deps.interp)
+        origin = os.path.dirname(os.path.realpath(path))
+        for name in deps.needed:
+            lib_path = _resolve_library(name, deps, origin)
+            if lib_path and lib_path not in seen:
+                seen.add(lib_path)
+                libs.add(lib_path)
+                pending.append(lib_path)
+    return libs
+
+
+# Defaults shared by every FilesystemConfig; tuples, so nothing is
+# allocated per instance and no instance can mutate another's default
+
+# Mask paths (replaced with empty dir or /dev/null)
+_DEFAULT_MASKED_PATHS = (
+    "/proc/kcore",
+    "/proc/sched_debug",
+    "/proc/scsi",
+    "/sys/firmware",
+)
+
+# Read-only paths
+_DEFAULT_READONLY_PATHS = (
+    "/proc/asound",
+    "/proc/bus",
+    "/proc/fs",
+    "/proc/irq",
+    "/proc/sys",
+    "/proc/sysrq-trigger",
+)
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class FilesystemConfig:
     """Configuration for filesystem isolation."""
 
@@ -34,33 +527,18 @@ class FilesystemConfig:
     working_dir: Optional[str] = None  # Working directory inside container
     read_only: bool = False  # Make rootfs read-only
 
-    # Bind mounts: list of (source, target, read_only) tuples
-    bind_mounts: List[tuple] = field(default_factory=list)
+    # Bind mounts: sequence of (source, target, read_only) tuples
+    bind_mounts: Sequence[tuple] = ()
 
-    # tmpfs mounts: list of (target, size) tuples (size in bytes, None for default)
-    tmpfs_mounts: List[tuple] = field(default_factory=list)
+    # tmpfs mounts: sequence of (target, size) tuples (size in bytes, None for default)
+    tmpfs_mounts: Sequence[tuple] = ()
 
-    # Mask paths (replaced with empty dir or /dev/null)
-    masked_paths: List[str] = field(
-        default_factory=lambda: [
-            "/proc/kcore",
-            "/proc/sched_debug",
-            "/proc/scsi",
-            "/sys/firmware",
-        ]
-    )
-
-    # Read-only paths
-    readonly_paths: List[str] = field(
-        default_factory=lambda: [
-            "/proc/asound",
-            "/proc/bus",
-            "/proc/fs",
-            "/proc/irq",
-            "/proc/sys",
-            "/proc/sysrq-trigger",
-        ]
-    )
+    masked_paths: Sequence[str] = _DEFAULT_MASKED_PATHS
+    readonly_paths: Sequence[str] = _DEFAULT_READONLY_PATHS
+
+
+_IS_LINUX = sys.platform.startswith("linux")
+_IS_ROOT = hasattr(os, "geteuid") and os.geteuid() == 0
 
 
 class FilesystemIsolation:
@@ -69,6 +547,10 @@ class FilesystemIsolation:
     Falls back gracefully when isolation is not available.
     """
 
+    # Process-wide facts, determined once at import
+    _is_linux = _IS_LINUX
+    _is_root = _IS_ROOT
+
     def __init__(self, config: Optional[FilesystemConfig] = None):
         """
         Initialize filesystem isolation.
@@ -77,11 +559,14 @@ class FilesystemIsolation:
             config: Filesystem configuration.
         """
         self.config = config or FilesystemConfig()
-        self._is_linux = sys.platform.startswith("linux")
-        self._is_root = os.geteuid() == 0
         self._old_root: Optional[str] = None
         self._initialized = False
 
+        # Libraries and directories copy_host_binaries() has already put in
+        # place, so repeat calls skip their stat and mkdir calls
+        self._copied: Set[str] = set()
+        self._dirs_made: Set[str] = set()
+
     @property
     def is_available(self) -> bool:
         """Check if filesystem isolation is available."""
@@ -101,34 +586,15 @@ class FilesystemIsolation:
         rootfs = Path(base_path) / "rootfs"
 
         try:
-            rootfs.mkdir(parents=True, exist_ok=True)
-
-            # Create minimal directory structure
-            for d in [
-                "bin",
-                "dev",
-                "etc",
-                "home",
-                "lib",
-                "lib64",
-                "proc",
-                "root",
-                "run",
-                "sbin",
-                "sys",
-                "tmp",
-                "usr",
-                "var",
-            ]:
-                (rootfs / d).mkdir(exist_ok=True)
-
-            # Create /usr subdirectories
-            for d in ["bin", "lib", "lib64", "sbin"]:
-                (rootfs / "usr" / d).mkdir(exist_ok=True)
-
-            # Create /var subdirectories
-            for d in ["cache", "lib", "log", "run", "tmp"]:
-                (rootfs / "var" / d).mkdir(exist_ok=True)
+            rootfs_str = str(rootfs)
+            ensure_dir(rootfs_str)
+
+            # Create minimal directory structure; existing entries just EEXIST
+            for d in _ROOTFS_DIRS:
+                try:
+                    os.mkdir(f"{rootfs_str}/{d}", 0o755)
+                except FileExistsError:
+                    pass
 
             # Create basic device nodes if we're root
             if self._is_root:
@@ -140,101 +606,74 @@ class FilesystemIsolation:
             return str(rootfs)
 
         except Exception as e:
-            print(f"Warning: Failed to prepare rootfs: {e}")
+            logger.warning("Failed to prepare rootfs: %s", e)
             return None
 
     def _create_devices(self, dev_path: Path) -> None:
         """Create basic device nodes."""
         # Device node creation requires root and mknod
         try:
-            import stat
+            dev = str(dev_path)
+
+            # mknod/symlink report EEXIST themselves, no need to stat first
+            for name, major, minor in _DEVICES:
+                try:
+                    os.mknod(
+                        f"{dev}/{name}",
+                        stat.S_IFCHR | 0o666,
+                        os.makedev(major, minor),
+                    )
+                except FileExistsError:
+                    pass
 
-            # null device (major 1, minor 3)
-            null_path = dev_path / "null"
-            if not null_path.exists():
-                os.mknod(str(null_path), stat.S_IFCHR | 0o666, os.makedev(1, 3))
-
-            # zero device (major 1, minor 5)
-            zero_path = dev_path / "zero"
-            if not zero_path.exists():
-                os.mknod(str(zero_path), stat.S_IFCHR | 0o666, os.makedev(1, 5))
-
-            # random device (major 1, minor 8)
-            random_path = dev_path / "random"
-            if not random_path.exists():
-                os.mknod(str(random_path), stat.S_IFCHR | 0o666, os.makedev(1, 8))
-
-            # urandom device (major 1, minor 9)
-            urandom_path = dev_path / "urandom"
-            if not urandom_path.exists():
-                os.mknod(str(urandom_path), stat.S_IFCHR | 0o666, os.makedev(1, 9))
-
-            # tty device (major 5, minor 0)
-            tty_path = dev_path / "tty"
-            if not tty_path.exists():
-                os.mknod(str(tty_path), stat.S_IFCHR | 0o666, os.makedev(5, 0))
+            try:
+                os.mkdir(f"{dev}/pts")
+            except FileExistsError:
+                pass
 
             # Create symlinks
-            pts_path = dev_path / "pts"
-            pts_path.mkdir(exist_ok=True)
-
-            stdin_link = dev_path / "stdin"
-            if not stdin_link.exists():
-                stdin_link.symlink_to("/proc/self/fd/0")
-
-            stdout_link = dev_path / "stdout"
-            if not stdout_link.exists():
-                stdout_link.symlink_to("/proc/self/fd/1")
-
-            stderr_link = dev_path / "stderr"
-            if not stderr_link.exists():
-                stderr_link.symlink_to("/proc/self/fd/2")
+            for name, target in _DEVICE_LINKS:
+                try:
+                    os.symlink(target, f"{dev}/{name}")
+                except FileExistsError:
+                    pass
 
         except Exception as e:
-            print(f"Warning: Failed to create some devices: {e}")
+            logger.warning("Failed to create some devices: %s", e)
 
     def _create_etc_files(self, etc_path: Path) -> None:
         """Create basic /etc files."""
-        # Create /etc/passwd
-        passwd_path = etc_path / "passwd"
-        if not passwd_path.exists():
-            with open(passwd_path, "w") as f:
-                f.write("root:x:0:0:root:/root:/bin/sh\n")
-                f.write("nobody:x:65534:65534:nobody:/:/sbin/nologin\n")
-
-        # Create /etc/group
-        group_path = etc_path / "group"
-        if not group_path.exists():
-            with open(group_path, "w") as f:
-                f.write("root:x:0:\n")
-                f.write("nobody:x:65534:\n")
-
-        # Create /etc/hosts
-        hosts_path = etc_path / "hosts"
-        if not hosts_path.exists():
-            with open(hosts_path, "w") as f:
-                f.write("127.0.0.1 localhost\n")
-                f.write("::1 localhost\n")
+        etc = str(etc_path)
+
+        # Create /etc/passwd, /etc/group and /etc/hosts unless already present
+        for name, content in _ETC_FILES:
+            _create_file(f"{etc}/{name}", content)
 
         # Create /etc/resolv.conf
-        resolv_path = etc_path / "resolv.conf"
-        if not resolv_path.exists():
+        resolv_path = f"{etc}/resolv.conf"
+        if _create_file(resolv_path, b""):
             # Copy from host if available
-            host_resolv = Path("/etc/resolv.conf")
-            if host_resolv.exists():
-                shutil.copy2(str(host_resolv), str(resolv_path))
-            else:
-                with open(resolv_path, "w") as f:
-                    f.write("nameserver 8.8.8.8\n")
-                    f.write("nameserver 8.8.4.4\n")
-
-    def mount_bind(self, source: str, target: str, read_only: bool = False) -> bool:
+            try:
+                fast_copy("/etc/resolv.conf", resolv_path)
+            except FileNotFoundError:
+                write_file(resolv_path, _DEFAULT_RESOLV_CONF)
+            except Exception:
+                # Don't leave an empty placeholder that later runs would keep
+                os.unlink(resolv_path)
+                raise
+
+    def mount_bind(
+        self,
+        source: _PathArg,
+        target: _PathArg,
+        read_only: bool = False,
+    ) -> bool:
         """
         Create a bind mount.
 
         Args:
-            source: Source path on host.
-            target: Target path in container.
+            source: Source path on host (str, bytes or path-like).
+            target: Target path in container (str, bytes or path-like).
             read_only: Whether to mount read-only.
 
         Returns:
@@ -244,27 +683,16 @@ class FilesystemIsolation:
             return False
 
         try:
-            import ctypes
-
-            libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            libc = _libc()
 
-            # Mount flags
-            MS_BIND = 4096
-            MS_RDONLY = 1
-            MS_REMOUNT = 32
+            source_b = os.fsencode(source)
+            target_b = os.fsencode(target)
 
-            # Ensure target exists
-            target_path = Path(target)
-            if Path(source).is_dir():
-                target_path.mkdir(parents=True, exist_ok=True)
-            else:
-                target_path.parent.mkdir(parents=True, exist_ok=True)
-                target_path.touch()
-
-            # First mount
-            source_b = source.encode("utf-8")
-            target_b = target.encode("utf-8")
-            ret = libc.mount(source_b, target_b, None, MS_BIND, None)
+            # First mount; the target is only created if it's missing
+            ret = libc.mount(source_b, target_b, None, _MS_BIND, None)
+            if _mount_point_missing(ret):
+                _create_mount_point(target_b, os.path.isdir(source_b))
+                ret = libc.mount(source_b, target_b, None, _MS_BIND, None)
 
             if ret != 0:
                 return False
@@ -272,21 +700,21 @@ class FilesystemIsolation:
             # Remount read-only if requested
             if read_only:
                 ret = libc.mount(
-                    source_b, target_b, None, MS_BIND | MS_REMOUNT | MS_RDONLY, None
+                    source_b, target_b, None, _MS_BIND | _MS_REMOUNT | _MS_RDONLY, None
                 )
 
             return ret == 0
 
         except Exception as e:
-            print(f"Warning: Failed to create bind mount: {e}")
+            logger.warning("Failed to create bind mount: %s", e)
             return False
 
-    def mount_tmpfs(self, target: str, size: Optional[int] = None) -> bool:
+    def mount_tmpfs(self, target: _PathArg, size: Optional[int] = None) -> bool:
         """
         Mount a tmpfs filesystem.
 
         Args:
-            target: Target path.
+            target: Target path (str, bytes or path-like).
             size: Size limit in bytes (None for default).
 
         Returns:
@@ -296,34 +724,29 @@ class FilesystemIsolation:
             return False
 
         try:
-            import ctypes
-
-            libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            libc = _libc()
 
-            # Ensure target exists
-            Path(target).mkdir(parents=True, exist_ok=True)
-
-            target_b = target.encode("utf-8")
+            target_b = os.fsencode(target)
             fstype_b = b"tmpfs"
+            options_b = f"size={size}".encode() if size is not None else None
 
-            options = ""
-            if size is not None:
-                options = f"size={size}"
-            options_b = options.encode("utf-8") if options else None
-
+            # The target is only created if it's missing
             ret = libc.mount(b"tmpfs", target_b, fstype_b, 0, options_b)
+            if _mount_point_missing(ret):
+                ensure_dir(target_b)
+                ret = libc.mount(b"tmpfs", target_b, fstype_b, 0, options_b)
             return ret == 0
 
         except Exception as e:
-            print(f"Warning: Failed to mount tmpfs: {e}")
+            logger.warning("Failed to mount tmpfs: %s", e)
             return False
 
-    def mount_proc(self, target: str) -> bool:
+    def mount_proc(self, target: _PathArg) -> bool:
         """
         Mount the proc filesystem.
 
         Args:
-            target: Target path (usually /proc in container).
+            target: Target path, usually /proc in container (str, bytes or path-like).
 
         Returns:
             True if successful, False otherwise.
@@ -332,17 +755,19 @@ class FilesystemIsolation:
             return False
 
         try:
-            import ctypes
-
-            libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            libc = _libc()
 
-            Path(target).mkdir(parents=True, exist_ok=True)
+            target_b = os.fsencode(target)
 
-            ret = libc.mount(b"proc", target.encode("utf-8"), b"proc", 0, None)
+            # The target is only created if it's missing
+            ret = libc.mount(b"proc", target_b, b"proc", 0, None)
+            if _mount_point_missing(ret):
+                ensure_dir(target_b)
+                ret = libc.mount(b"proc", target_b, b"proc", 0, None)
             return ret == 0
 
         except Exception as e:
-            print(f"Warning: Failed to mount proc: {e}")
+            logger.warning("Failed to mount proc: %s", e)
             return False
 
     def chroot(self, rootfs: str) -> bool:
@@ -356,7 +781,7 @@ class FilesystemIsolation:
             True if successful, False otherwise.
         """
         if not self.is_available:
-            print("Warning: chroot not available, running without filesystem isolation")
+            logger.warning("chroot not available, running without filesystem isolation")
             return False
 
         try:
@@ -367,44 +792,40 @@ class FilesystemIsolation:
             return True
 
         except Exception as e:
-            print(f"Warning: Failed to chroot: {e}")
+            logger.warning("Failed to chroot: %s", e)
             return False
 
-    def pivot_root(self, new_root: str, put_old: str) -> bool:
+    def pivot_root(self, new_root: _PathArg, put_old: _PathArg) -> bool:
         """
         Use pivot_root for more complete isolation than chroot.
         Requires being in a mount namespace.
 
         Args:
-            new_root: Path to new root.
-            put_old: Path under new_root to mount old root.
+            new_root: Path to new root (str, bytes or path-like).
+            put_old: Path under new_root to mount old root (str, bytes or path-like).
 
         Returns:
             True if successful, False otherwise.
         """
-        if not self.is_available:
+        if not self.is_available or _SYS_PIVOT_ROOT is None:
             return False
 
         try:
-            import ctypes
+            libc = _libc()
 
-            libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            # Encode once; every path below is derived from these bytes
+            new_root_b = os.fsencode(new_root)
+            put_old_rel = os.fsencode(put_old).lstrip(b"/")
+            put_old_full = new_root_b.rstrip(b"/") + b"/" + put_old_rel
 
             # Ensure put_old path exists
-            put_old_path = Path(new_root) / put_old.lstrip("/")
-            put_old_path.mkdir(parents=True, exist_ok=True)
+            os.makedirs(put_old_full, exist_ok=True)
 
             # Make new_root a mount point (bind mount to itself)
-            MS_BIND = 4096
-            MS_REC = 16384
-            new_root_b = new_root.encode("utf-8")
-            libc.mount(new_root_b, new_root_b, None, MS_BIND | MS_REC, None)
+            libc.mount(new_root_b, new_root_b, None, _MS_BIND | _MS_REC, None)
 
-            # Perform pivot_root via syscall
-            SYS_pivot_root = 155  # x86_64
-            ret = libc.syscall(
-                SYS_pivot_root, new_root_b, str(put_old_path).encode("utf-8")
-            )
+            # Perform pivot_root via syscall; glibc has no wrapper for it
+            ret = libc.syscall(_SYS_PIVOT_ROOT, new_root_b, put_old_full)
 
             if ret != 0:
                 return False
@@ -412,9 +833,8 @@ class FilesystemIsolation:
             os.chdir("/")
 
             # Unmount old root
-            MNT_DETACH = 2
-            old_root_in_new = "/" + put_old.lstrip("/")
-            libc.umount2(old_root_in_new.encode("utf-8"), MNT_DETACH)
+            old_root_in_new = b"/" + put_old_rel
+            libc.umount2(old_root_in_new, _MNT_DETACH)
 
             # Remove old root directory
             try:
@@ -426,7 +846,7 @@ class FilesystemIsolation:
             return True
 
         except Exception as e:
-            print(f"Warning: Failed to pivot_root: {e}")
+            logger.warning("Failed to pivot_root: %s", e)
             return False
 
     def apply_configuration(self, rootfs: str) -> bool:
@@ -444,28 +864,50 @@ class FilesystemIsolation:
 
         success = True
 
-        # Mount proc
-        proc_path = os.path.join(rootfs, "proc")
-        if not self.mount_proc(proc_path):
-            success = False
+        # Encode the rootfs prefix once; mount targets are built as bytes
+        rootfs_b = os.fsencode(rootfs).rstrip(b"/") + b"/"
+        proc_target = rootfs_b + b"proc"
 
-        # Apply bind mounts
+        binds = []
         for mount_spec in self.config.bind_mounts:
             if len(mount_spec) >= 2:
-                source, target = mount_spec[0], mount_spec[1]
+                source = os.fsencode(mount_spec[0])
                 read_only = mount_spec[2] if len(mount_spec) > 2 else False
-                full_target = os.path.join(rootfs, target.lstrip("/"))
-                if not self.mount_bind(source, full_target, read_only):
-                    success = False
+                full_target = rootfs_b + os.fsencode(mount_spec[1]).lstrip(b"/")
+                binds.append((source, full_target, read_only))
 
-        # Apply tmpfs mounts
+        tmpfs = []
         for mount_spec in self.config.tmpfs_mounts:
             if len(mount_spec) >= 1:
-                target = mount_spec[0]
                 size = mount_spec[1] if len(mount_spec) > 1 else None
-                full_target = os.path.join(rootfs, target.lstrip("/"))
-                if not self.mount_tmpfs(full_target, size):
-                    success = False
+                full_target = rootfs_b + os.fsencode(mount_spec[0]).lstrip(b"/")
+                tmpfs.append((full_target, size))
+
+        # Create all mount points up front, in the order they're mounted
+        mount_points = [(proc_target, True)]
+        mount_points.extend(
+            (target, os.path.isdir(source)) for source, target, _ in binds
+        )
+        mount_points.extend((target, True) for target, _ in tmpfs)
+        try:
+            _create_mount_points(mount_points)
+        except OSError:
+            # Each mount below retries creating its own target
+            pass
+
+        # Mount proc
+        if not self.mount_proc(proc_target):
+            success = False
+
+        # Apply bind mounts
+        for source, target, read_only in binds:
+            if not self.mount_bind(source, target, read_only):
+                success = False
+
+        # Apply tmpfs mounts
+        for target, size in tmpfs:
+            if not self.mount_tmpfs(target, size):
+                success = False
 
         # chroot into the filesystem
         if not self.chroot(rootfs):
@@ -491,47 +933,56 @@ class FilesystemIsolation:
         Returns:
             True if all binaries were copied.
         """
-        import subprocess
-
+        # Resolve everything up front; PATH lookups are cached across calls
+        resolved: List[str] = []
         for binary in binaries:
-            if not os.path.exists(binary):
-                # Try to find it in PATH
-                result = subprocess.run(
-                    ["which", binary], capture_output=True, text=True
-                )
-                if result.returncode != 0:
-                    continue
-                binary = result.stdout.strip()
+            path = _resolve_binary(binary)
+            if path and path not in resolved:
+                resolved.append(path)
 
-            if not binary or not os.path.exists(binary):
-                continue
+        if not resolved:
+            return True
 
-            # Copy binary
-            dest_path = Path(rootfs) / binary.lstrip("/")
-            dest_path.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(binary, str(dest_path))
+        # Read DT_NEEDED in-process instead of running ldd; shared
+        # libraries are copied once
+        libs = _library_closure(resolved)
 
-            # Get library dependencies
-            try:
-                result = subprocess.run(["ldd", binary], capture_output=True, text=True)
-                if result.returncode == 0:
-                    for line in result.stdout.splitlines():
-                        parts = line.strip().split()
-                        if len(parts) >= 3 and "=>" in line:
-                            lib_path = parts[2]
-                            if lib_path and os.path.exists(lib_path):
-                                dest_lib = Path(rootfs) / lib_path.lstrip("/")
-                                dest_lib.parent.mkdir(parents=True, exist_ok=True)
-                                if not dest_lib.exists():
-                                    shutil.copy2(lib_path, str(dest_lib))
-                        elif len(parts) >= 1 and parts[0].startswith("/"):
-                            lib_path = parts[0]
-                            if os.path.exists(lib_path):
-                                dest_lib = Path(rootfs) / lib_path.lstrip("/")
-                                dest_lib.parent.mkdir(parents=True, exist_ok=True)
-                                if not dest_lib.exists():
-                                    shutil.copy2(lib_path, str(dest_lib))
-            except Exception:
-                pass
+        # Build the whole copy list; copy2 keeps binaries' xattrs such as
+        # file capabilities, libraries only need their data and mode
+        def dest_of(path: str) -> str:
+            return os.path.join(rootfs, path.lstrip("/"))
+
+        copies: List[Tuple[Callable[[str, str], object], str, str]] = [
+            (shutil.copy2, binary, dest_of(binary)) for binary in resolved
+        ]
+        for lib_path in sorted(libs):
+            dest = dest_of(lib_path)
+            if dest not in self._copied and not os.path.exists(dest):
+                copies.append((fast_copy, lib_path, dest))
+
+        # Create destination directories up front so workers only copy
+        parents = {os.path.dirname(dest) for _, _, dest in copies}
+        for parent in sorted(parents - self._dirs_made):
+            ensure_dir(parent)
+        self._dirs_made |= parents
+
+        max_workers = min(8, (os.cpu_count() or 1) * 2)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(copy_file, src, dest) for copy_file, src, dest in copies
+            ]
+            for future in futures[: len(resolved)]:
+                future.result()
+            # As with ldd before, a library that can't be copied is logged
+            # rather than failing the whole copy
+            for (_, lib_path, dest), future in zip(
+                copies[len(resolved) :], futures[len(resolved) :]
+            ):
+                try:
+                    future.result()
+                except OSError as e:
+                    logger.warning("Failed to copy library %s: %s", lib_path, e)
+                else:
+                    self._copied.add(dest)
 
         return True
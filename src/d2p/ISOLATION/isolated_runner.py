@@ -17,17 +17,49 @@ Isolated process runner that combines namespaces, cgroups, and filesystem isolat
 Provides a unified interface for running processes with container-like isolation.
 """
 
+import functools
 import os
+import select
+import shutil
 import sys
 import subprocess
 import signal
-from typing import List, Dict, Optional, Callable, Any
+from typing import List, Dict, Optional, Any, Sequence, Tuple
 from dataclasses import dataclass, field
 from pathlib import Path
 
-from .namespace_manager import NamespaceManager, NamespaceConfig, NamespaceType
+from .namespace_manager import (
+    _IS_LINUX,
+    NamespaceManager,
+    NamespaceConfig,
+    NamespaceType,
+)
 from .cgroup_manager import CgroupManager, ResourceLimits
-from .filesystem_isolation import FilesystemIsolation, FilesystemConfig
+from .filesystem_isolation import _IS_ROOT, FilesystemIsolation, FilesystemConfig
+
+# Script run in the child to enter namespaces before exec'ing the command
+WRAPPER_PATH = str(Path(__file__).with_name("_wrapper_main.py"))
+
+# Isolated mode, no site import, no asserts/docstrings: the wrapper only
+# needs os, sys and ctypes, so interpreter start-up is kept to a minimum
+WRAPPER_PYTHON_FLAGS = ("-I", "-S", "-OO")
+
+
+@functools.lru_cache(maxsize=1)
+def _setpriv() -> Optional[str]:
+    """Path of util-linux setpriv, used to set no_new_privs before exec."""
+    return shutil.which("setpriv")
+
+
+def _open_pidfd(pid: int) -> Optional[int]:
+    """Open a pidfd for pid, or return None where pidfds are unsupported."""
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        # ENOSYS before Linux 5.3
+        return None
 
 
 @dataclass
@@ -76,6 +108,7 @@ class IsolatedRunner:
         self.config = config or IsolationConfig()
         self._process: Optional[subprocess.Popen] = None
         self._pid: Optional[int] = None
+        self._pidfd: Optional[int] = None  # Becomes readable when the process exits
         self._isolation_active = False
 
         # Initialize managers
@@ -106,7 +139,7 @@ class IsolatedRunner:
     @property
     def is_linux(self) -> bool:
         """Check if running on Linux."""
-        return sys.platform.startswith("linux")
+        return _IS_LINUX
 
     @property
     def isolation_available(self) -> bool:
@@ -148,6 +181,23 @@ class IsolatedRunner:
         Returns:
             The subprocess.Popen object.
         """
+        # Set up cgroup first (before spawning process)
+        cgroup_created = self._cgroup_mgr.create()
+        if cgroup_created:
+            self._cgroup_mgr.apply_limits()
+
+        return self._start(command, env, working_dir, stdout, stderr, cgroup_created)
+
+    def _start(
+        self,
+        command: List[str],
+        env: Optional[Dict[str, str]],
+        working_dir: Optional[str],
+        stdout: Optional[int],
+        stderr: Optional[int],
+        cgroup_created: bool,
+    ) -> subprocess.Popen:
+        """Spawn the command once the cgroup has been set up; see run()."""
         # Prepare environment
         run_env = os.environ.copy()
         if env:
@@ -156,11 +206,6 @@ class IsolatedRunner:
         # Use configured working_dir or parameter
         cwd = working_dir or self.config.working_dir
 
-        # Set up cgroup first (before spawning process)
-        cgroup_created = self._cgroup_mgr.create()
-        if cgroup_created:
-            self._cgroup_mgr.apply_limits()
-
         # For full isolation, we need to fork and exec with setup
         if self._should_use_full_isolation():
             return self._run_isolated(command, run_env, cwd, stdout, stderr)
@@ -189,19 +234,50 @@ class IsolatedRunner:
     ) -> subprocess.Popen:
         """
         Run with basic isolation (cgroups only, no namespaces).
+
+        No Python preexec_fn is used, so subprocess can spawn with vfork
+        instead of a full fork: UID/GID are switched by Popen itself,
+        no_new_privs is set by setpriv, and the cgroup is joined from the
+        parent. Without setpriv, the isolation wrapper does all three.
         """
+        args = command
+        if self.config.no_new_privileges and self.is_linux:
+            setpriv = _setpriv()
+            if setpriv is None:
+                return self._spawn_wrapper(
+                    command,
+                    env,
+                    cwd,
+                    NamespaceType.NONE,
+                    stdout,
+                    stderr,
+                    cgroup_created,
+                )
+            args = [setpriv, "--no-new-privs", "--", *command]
+
+        # As before, a UID/GID switch only happens when we're allowed to make it
+        is_root = _IS_ROOT
+
         try:
             self._process = subprocess.Popen(
-                command,
+                args,
                 env=env,
                 cwd=cwd,
                 stdout=stdout if stdout else subprocess.PIPE,
                 stderr=stderr if stderr else subprocess.PIPE,
                 text=True,
                 shell=False,
-                preexec_fn=self._get_preexec_fn(cgroup_created),
+                user=self.config.uid if is_root else None,
+                group=self.config.gid if is_root else None,
             )
             self._pid = self._process.pid
+            self._pidfd = _open_pidfd(self._pid)
+
+            # cgroup v2 allows attaching after spawn; the command is still
+            # starting up at this point, before it would fork workers
+            if cgroup_created:
+                self._cgroup_mgr.add_process(self._pid)
+
             self._isolation_active = cgroup_created
             return self._process
 
@@ -221,126 +297,65 @@ class IsolatedRunner:
         Run with full isolation (namespaces + cgroups + filesystem).
         Uses a wrapper script that applies isolation before exec.
         """
-        # Create an isolation wrapper
+        # Run through the isolation wrapper
         # This is necessary because some namespace operations (like PID namespace)
         # need to be done before exec
+        return self._spawn_wrapper(
+            command, env, cwd, self.config.namespaces, stdout, stderr, True
+        )
 
-        wrapper_code = self._generate_isolation_wrapper(command, env, cwd)
+    def _spawn_wrapper(
+        self,
+        command: List[str],
+        env: Dict[str, str],
+        cwd: Optional[str],
+        namespaces: NamespaceType,
+        stdout: Optional[int],
+        stderr: Optional[int],
+        join_cgroup: bool,
+    ) -> subprocess.Popen:
+        """
+        Start command through the isolation wrapper script.
+
+        The wrapper joins the cgroup, enters namespaces, switches UID/GID and
+        sets no_new_privs in the child, so Popen itself needs no preexec_fn.
+        The wrapper inherits env as-is.
+        """
+        config = self.config
+        procs_path = self._cgroup_mgr.procs_path if join_cgroup else None
+        wrapper_argv = [
+            sys.executable,
+            *WRAPPER_PYTHON_FLAGS,
+            WRAPPER_PATH,
+            str(int(namespaces)),
+            config.hostname or "",
+            cwd or "",
+            procs_path or "",
+            "" if config.uid is None else str(config.uid),
+            "" if config.gid is None else str(config.gid),
+            "1" if config.no_new_privileges else "0",
+            "--",
+            *command,
+        ]
 
         try:
             self._process = subprocess.Popen(
-                [sys.executable, "-c", wrapper_code],
+                wrapper_argv,
                 stdout=stdout if stdout else subprocess.PIPE,
                 stderr=stderr if stderr else subprocess.PIPE,
                 text=True,
                 shell=False,
                 env=env,
-                preexec_fn=self._get_preexec_fn(True),
             )
             self._pid = self._process.pid
-            self._isolation_active = True
+            self._pidfd = _open_pidfd(self._pid)
+            self._isolation_active = join_cgroup
             return self._process
 
         except Exception as e:
             print(f"[{self.name}] Failed to start isolated process: {e}")
             raise
 
-    def _get_preexec_fn(self, add_to_cgroup: bool) -> Optional[Callable]:
-        """Get a preexec function for subprocess setup."""
-        cgroup_mgr = self._cgroup_mgr if add_to_cgroup else None
-        config = self.config
-
-        def preexec():
-            # Add to cgroup
-            if cgroup_mgr and cgroup_mgr._initialized:
-                cgroup_mgr.add_process(os.getpid())
-
-            # Set UID/GID if specified
-            if config.gid is not None:
-                try:
-                    os.setgid(config.gid)
-                except PermissionError:
-                    pass
-
-            if config.uid is not None:
-                try:
-                    os.setuid(config.uid)
-                except PermissionError:
-                    pass
-
-            # Set no_new_privileges (prevents setuid binaries from gaining privileges)
-            if config.no_new_privileges and sys.platform.startswith("linux"):
-                try:
-                    import ctypes
-
-                    libc = ctypes.CDLL("libc.so.6", use_errno=True)
-                    PR_SET_NO_NEW_PRIVS = 38
-                    libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
-                except Exception:
-                    pass
-
-        return preexec
-
-    def _generate_isolation_wrapper(
-        self, command: List[str], env: Dict[str, str], cwd: Optional[str]
-    ) -> str:
-        """Generate Python code for the isolation wrapper."""
-        import json
-
-        cmd_json = json.dumps(command)
-        env_json = json.dumps(env)
-        cwd_json = json.dumps(cwd)
-
-        ns_flags = int(self.config.namespaces)
-        hostname = json.dumps(self.config.hostname)
-
-        return f"""
-import os
-import sys
-import ctypes
-import json
-
-# Configuration
-command = {cmd_json}
-env = {env_json}
-cwd = {cwd_json}
-ns_flags = {ns_flags}
-hostname = {hostname}
-
-# Try to apply namespaces
-try:
-    libc = ctypes.CDLL("libc.so.6", use_errno=True)
-    
-    # Create new namespaces
-    if ns_flags > 0:
-        ret = libc.unshare(ns_flags)
-        if ret != 0:
-            print("Warning: unshare failed", file=sys.stderr)
-    
-    # Set hostname if provided and UTS namespace is used
-    UTS_FLAG = 0x04000000
-    if (ns_flags & UTS_FLAG) and hostname:
-        hostname_bytes = hostname.encode('utf-8')
-        libc.sethostname(hostname_bytes, len(hostname_bytes))
-
-except Exception as e:
-    print(f"Warning: Isolation setup failed: {{e}}", file=sys.stderr)
-
-# Set environment
-os.environ.clear()
-os.environ.update(env)
-
-# Change directory
-if cwd:
-    try:
-        os.chdir(cwd)
-    except Exception:
-        pass
-
-# Execute command
-os.execvp(command[0], command)
-"""
-
     def stop(self, timeout: int = 10) -> None:
         """
         Stop the running process.
@@ -348,20 +363,53 @@ os.execvp(command[0], command)
         Args:
             timeout: Seconds to wait for graceful termination.
         """
-        if self._process is None:
+        process = self._process
+        if process is None:
             return
 
         try:
-            self._process.terminate()
-            self._process.wait(timeout=timeout)
+            self._send_signal(process, signal.SIGTERM)
+            self._wait(process, timeout)
         except subprocess.TimeoutExpired:
-            self._process.kill()
-            self._process.wait()
+            self._send_signal(process, signal.SIGKILL)
+            process.wait()
         except Exception as e:
             print(f"[{self.name}] Error stopping process: {e}")
         finally:
             self._cleanup()
 
+    def _send_signal(self, process: subprocess.Popen, sig: int) -> None:
+        """Signal the process, through its pidfd when there is one."""
+        if self._pidfd is None:
+            process.send_signal(sig)
+            return
+        if process.returncode is not None:
+            return
+        try:
+            # Can't hit a recycled PID, unlike kill()
+            signal.pidfd_send_signal(self._pidfd, sig)
+        except ProcessLookupError:
+            pass
+
+    def _wait(self, process: subprocess.Popen, timeout: float) -> None:
+        """
+        Wait for the process to exit and reap it.
+
+        With a pidfd this is a single poll() that wakes on exit, rather than
+        Popen.wait()'s sleep-and-waitpid loop.
+
+        Raises:
+            subprocess.TimeoutExpired: If it is still running after timeout.
+        """
+        if self._pidfd is None:
+            process.wait(timeout=timeout)
+            return
+        poller = select.poll()
+        poller.register(self._pidfd, select.POLLIN)
+        if not poller.poll(timeout * 1000):
+            raise subprocess.TimeoutExpired(process.args, timeout)
+        process.wait()
+
     def is_running(self) -> bool:
         """Check if the process is still running."""
         if self._process is None:
@@ -393,11 +441,41 @@ os.execvp(command[0], command)
         if self._cgroup_mgr._initialized:
             self._cgroup_mgr.cleanup()
 
+        if self._pidfd is not None:
+            os.close(self._pidfd)
+            self._pidfd = None
+
         self._process = None
         self._pid = None
         self._isolation_active = False
 
 
+def run_all(
+    jobs: Sequence[Tuple[IsolatedRunner, List[str]]],
+    env: Optional[Dict[str, str]] = None,
+) -> List[subprocess.Popen]:
+    """
+    Start a group of runners, setting up all their cgroups first.
+
+    The cgroups are created and limited together through
+    CgroupManager.provision_batch(), in parallel for large groups, and
+    only then are the processes spawned. Each process still joins its own
+    cgroup with one write: cgroup.procs takes a single PID per write().
+
+    Args:
+        jobs: (runner, command) pairs.
+        env: Extra environment variables for every command.
+
+    Returns:
+        One process per job, in order.
+    """
+    created = CgroupManager.provision_batch([runner._cgroup_mgr for runner, _ in jobs])
+    return [
+        runner._start(command, env, None, None, None, cgroup_created)
+        for (runner, command), cgroup_created in zip(jobs, created)
+    ]
+
+
 def create_isolation_config_from_service(service_def) -> IsolationConfig:
     """
     Create an IsolationConfig from a ServiceDefinition.
@@ -17,6 +17,7 @@ Linux namespace management for process isolation.
 Supports PID, NET, MNT, IPC, UTS namespaces with graceful degradation.
 """
 
+import functools
 import os
 import sys
 import ctypes
@@ -52,6 +53,95 @@ class NamespaceType(IntFlag):
     FULL = MOUNT | UTS | IPC | PID | NET  # Full isolation (except user)
 
 
+class _Libc:
+    """libc namespace entry points with argtypes declared once."""
+
+    def __init__(self):
+        libc = ctypes.CDLL("libc.so.6", use_errno=True)
+
+        self.unshare = libc.unshare
+        self.unshare.argtypes = [ctypes.c_int]
+        self.unshare.restype = ctypes.c_int
+
+        self.sethostname = libc.sethostname
+        self.sethostname.argtypes = [ctypes.c_char_p, ctypes.c_size_t]
+        self.sethostname.restype = ctypes.c_int
+
+
+@functools.lru_cache(maxsize=1)
+def _libc() -> _Libc:
+    """Load libc on first use; raises OSError where it isn't available."""
+    return _Libc()
+
+
+# Individual namespace flags, without NONE and the combinations
+_SINGLE_NAMESPACES = (
+    NamespaceType.MOUNT,
+    NamespaceType.UTS,
+    NamespaceType.IPC,
+    NamespaceType.USER,
+    NamespaceType.PID,
+    NamespaceType.NET,
+    NamespaceType.CGROUP,
+)
+
+
+_IS_LINUX = sys.platform.startswith("linux")
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_available_namespaces() -> NamespaceType:
+    """
+    Detect which namespaces are available on this system.
+
+    Neither euid nor the userns sysctl change for the life of the process,
+    so this runs once and every NamespaceManager shares the result.
+
+    Returns:
+        Mask of the namespaces this process can create.
+    """
+    # Check if we're root or have CAP_SYS_ADMIN
+    is_root = os.geteuid() == 0
+
+    # Check for user namespace support (doesn't require root)
+    # One unbuffered open+read; a missing sysctl means the feature is absent
+    user_ns_enabled = False
+    try:
+        fd = os.open("/proc/sys/kernel/unprivileged_userns_clone", os.O_RDONLY)
+    except (FileNotFoundError, PermissionError):
+        pass
+    else:
+        try:
+            user_ns_enabled = os.read(fd, 2).strip() == b"1"
+        finally:
+            os.close(fd)
+
+    available = NamespaceType.NONE
+    if user_ns_enabled:
+        available |= NamespaceType.USER
+
+    if is_root:
+        # Root can use all namespaces
+        available |= (
+            NamespaceType.MOUNT
+            | NamespaceType.UTS
+            | NamespaceType.IPC
+            | NamespaceType.PID
+            | NamespaceType.NET
+            | NamespaceType.CGROUP
+        )
+    elif user_ns_enabled:
+        # With user namespace, we can potentially use other namespaces
+        available |= (
+            NamespaceType.MOUNT
+            | NamespaceType.UTS
+            | NamespaceType.IPC
+            | NamespaceType.PID
+        )
+
+    return available
+
+
 @dataclass
 class NamespaceConfig:
     """Configuration for namespace isolation."""
@@ -68,6 +158,8 @@ class NamespaceManager:
     Falls back gracefully when running on non-Linux or without privileges.
     """
 
+    _is_linux = _IS_LINUX
+
     def __init__(self, config: Optional[NamespaceConfig] = None):
         """
         Initialize the namespace manager.
@@ -76,9 +168,9 @@ class NamespaceManager:
             config: Namespace configuration. If None, uses default (no isolation).
         """
         self.config = config or NamespaceConfig(namespaces=NamespaceType.NONE)
-        self._is_linux = sys.platform.startswith("linux")
-        self._libc: Optional[ctypes.CDLL] = None
+        self._libc: Optional[_Libc] = None
         self._available_namespaces: Set[NamespaceType] = set()
+        self._available_mask = NamespaceType.NONE  # Union of the set above
         self._initialized = False
 
         if self._is_linux:
@@ -87,7 +179,7 @@ class NamespaceManager:
     def _init_linux(self) -> None:
         """Initialize Linux-specific resources."""
         try:
-            self._libc = ctypes.CDLL("libc.so.6", use_errno=True)
+            self._libc = _libc()
             self._detect_available_namespaces()
         except OSError as e:
             print(f"Warning: Could not load libc: {e}")
@@ -95,39 +187,11 @@ class NamespaceManager:
 
     def _detect_available_namespaces(self) -> None:
         """Detect which namespaces are available on this system."""
-        # Check if we're root or have CAP_SYS_ADMIN
-        is_root = os.geteuid() == 0
-
-        # Check for user namespace support (doesn't require root)
-        user_ns_path = "/proc/sys/kernel/unprivileged_userns_clone"
-        user_ns_enabled = False
-        if os.path.exists(user_ns_path):
-            try:
-                with open(user_ns_path, "r") as f:
-                    user_ns_enabled = f.read().strip() == "1"
-            except PermissionError:
-                pass
-
-        if user_ns_enabled:
-            self._available_namespaces.add(NamespaceType.USER)
-
-        if is_root:
-            # Root can use all namespaces
-            for ns_type in [
-                NamespaceType.MOUNT,
-                NamespaceType.UTS,
-                NamespaceType.IPC,
-                NamespaceType.PID,
-                NamespaceType.NET,
-                NamespaceType.CGROUP,
-            ]:
-                self._available_namespaces.add(ns_type)
-        elif user_ns_enabled:
-            # With user namespace, we can potentially use other namespaces
-            self._available_namespaces.add(NamespaceType.MOUNT)
-            self._available_namespaces.add(NamespaceType.UTS)
-            self._available_namespaces.add(NamespaceType.IPC)
-            self._available_namespaces.add(NamespaceType.PID)
+        available = _detect_available_namespaces()
+        self._available_mask = available
+        self._available_namespaces = {
+            ns_type for ns_type in _SINGLE_NAMESPACES if available & ns_type
+        }
 
     @property
     def is_available(self) -> bool:
@@ -146,14 +210,7 @@ class NamespaceManager:
         """
         if not self.is_available:
             return NamespaceType.NONE
-
-        effective = NamespaceType.NONE
-        for ns_type in NamespaceType:
-            if (self.config.namespaces & ns_type) and (
-                ns_type in self._available_namespaces
-            ):
-                effective |= ns_type
-        return effective
+        return NamespaceType(self.config.namespaces & self._available_mask)
 
     def unshare(self, namespaces: Optional[NamespaceType] = None) -> bool:
         """
@@ -172,12 +229,9 @@ class NamespaceManager:
             return False
 
         ns_to_create = namespaces if namespaces is not None else self.config.namespaces
-        effective_ns = NamespaceType.NONE
 
         # Calculate effective namespaces
-        for ns_type in NamespaceType:
-            if (ns_to_create & ns_type) and (ns_type in self._available_namespaces):
-                effective_ns |= ns_type
+        effective_ns = NamespaceType(ns_to_create & self._available_mask)
 
         if effective_ns == NamespaceType.NONE:
             return True  # Nothing to do
@@ -15,8 +15,9 @@
 """
 Managers for handling environment variables and .env file resolution.
 """
+
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from ..PARSERS.env_parser import EnvParser
 
 
@@ -33,6 +34,29 @@ class EnvironmentManager:
         """
         self.base_dir = base_dir
         self.parser = EnvParser()
+        # Parsed .env files by path, with the (st_mtime_ns, st_size) they were parsed at
+        self._env_file_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, str]]] = {}
+
+    def _load_env_file(self, file_path: str) -> Optional[Dict[str, str]]:
+        """
+        Returns the parsed contents of an .env file, re-parsing only when it changed.
+
+        :param file_path: Path to the .env file.
+        :return: The file's variables (shared; do not modify), or None if it is missing.
+        """
+        try:
+            st = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+
+        key = (st.st_mtime_ns, st.st_size)
+        cached = self._env_file_cache.get(file_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        file_env = self.parser.parse(file_path)
+        self._env_file_cache[file_path] = (key, file_env)
+        return file_env
 
     def get_merged_environment(
         self, explicit_env: Dict[str, str], env_files: List[str]
@@ -49,9 +73,8 @@ class EnvironmentManager:
 
         # 1. Load from env files (later files override earlier ones)
         for env_file in env_files:
-            file_path = os.path.join(self.base_dir, env_file)
-            if os.path.exists(file_path):
-                file_env = self.parser.parse(file_path)
+            file_env = self._load_env_file(os.path.join(self.base_dir, env_file))
+            if file_env is not None:
                 merged_env.update(file_env)
 
         # 2. Explicit environment variables override everything
@@ -15,7 +15,7 @@
 """
 Models representing container images and their configurations.
 """
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from pydantic import BaseModel
 
 
@@ -44,5 +44,7 @@ class ContainerImage(BaseModel):
     entrypoint: List[str] = []
 
     run_instructions: List[str] = []
+    copy_instructions: List[Dict[str, Any]] = []
+    add_instructions: List[Dict[str, Any]] = []
 
     labels: Dict[str, str] = {}
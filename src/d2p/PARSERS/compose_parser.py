@@ -15,6 +15,8 @@
 """
 Parsers for Docker Compose YAML files.
 """
+import hashlib
+import re
 import yaml
 from typing import Dict, Any, List, Optional
 from ..MODELS.orchestration_config import OrchestrationConfig
@@ -22,6 +24,12 @@ from ..MODELS.service_definition import ServiceDefinition, RestartPolicy, Volume
 from ..UTILS.string_interpolation import EnvironmentInterpolator
 import os
 
+# Prefer the libyaml-backed loader; fall back to the pure-Python one
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Names of variables referenced as ${VAR...} in a compose file
+_VAR_NAME_RE = re.compile(r"\$\{([^}:]+)")
+
 
 class ComposeParser:
     """
@@ -47,6 +55,55 @@ class ComposeParser:
             content = f.read()
         return self.parse_from_string(content)
 
+    def parse_cached(self, compose_path: str, cache_dir: str) -> OrchestrationConfig:
+        """
+        Parses a compose file, reusing a JSON-serialized result stored in cache_dir.
+
+        The cached result is used only while the file content and the values of
+        the variables it interpolates are unchanged.
+
+        :param compose_path: Path to the compose file.
+        :param cache_dir: Directory holding cached parse results.
+        :return: Parsed configuration.
+        """
+        with open(compose_path, "r") as f:
+            content = f.read()
+
+        digest = hashlib.blake2b(content.encode(), digest_size=16)
+        for var in sorted(set(_VAR_NAME_RE.findall(content))):
+            digest.update(f"\0{var}={self.context.get(var)}".encode())
+        key = digest.hexdigest()
+
+        path_hash = hashlib.blake2b(
+            os.path.abspath(compose_path).encode(), digest_size=8
+        ).hexdigest()
+        cache_file = os.path.join(cache_dir, f"compose-{path_hash}.json")
+
+        # The entry is the cache key on the first line, then the model as
+        # JSON; it is validated rather than unpickled, so a planted cache
+        # file can't run code
+        try:
+            with open(cache_file, "r") as f:
+                cached_key, _, cached = f.read().partition("\n")
+            if cached_key == key:
+                return OrchestrationConfig.model_validate_json(cached)
+        except (OSError, ValueError):
+            # Missing, stale or unreadable cache entry; parse normally
+            pass
+
+        config = self.parse_from_string(content)
+
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = f"{cache_file}.tmp"
+            with open(tmp_file, "w") as f:
+                f.write(f"{key}\n{config.model_dump_json()}")
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            pass
+
+        return config
+
     def parse_from_string(self, content: str) -> OrchestrationConfig:
         """
         Parses a compose file from a string.
@@ -63,7 +120,7 @@ class ComposeParser:
             # In Docker, ${VAR} if unset is empty string.
             print(f"Warning during interpolation: {e}")
 
-        data = yaml.safe_load(content)
+        data = yaml.load(content, Loader=_SafeLoader)
         if not data:
             data = {}
 
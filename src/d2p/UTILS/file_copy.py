@@ -0,0 +1,175 @@
+# Copyright 2024 Michael Maillet, Damien Davison, Sacha Davison
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Utilities for copying and writing files with as few syscalls as possible.
+"""
+
+import os
+import shutil
+import stat
+import sys
+from typing import Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+# Buffer size for the userspace fallback copy
+COPY_BUFSIZE = 1 << 20
+
+# ioctl(2) request that makes dst share src's extents (linux/fs.h)
+FICLONE = 0x40049409
+
+
+def _reflink(src_fd: int, dst_fd: int) -> bool:
+    """
+    Clones a whole file with the FICLONE ioctl on filesystems that support it.
+
+    The destination shares the source's data blocks copy-on-write, so no data
+    is read or written whatever the file size (Btrfs, XFS with reflink, ...).
+
+    :param src_fd: Open descriptor of the source file.
+    :param dst_fd: Open, writable descriptor of the destination file.
+    :return: True if the file was cloned; False if reflinks are unsupported here.
+    """
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError:
+        # EOPNOTSUPP/ENOTTY on ext4, tmpfs...; EXDEV across filesystems
+        return False
+    return True
+
+
+def _copy_in_kernel(copy_chunk, size: int) -> int:
+    """
+    Drive an in-kernel copy primitive until size bytes are copied.
+
+    :param copy_chunk: Callable taking (offset, count) and returning bytes copied.
+    :param size: Total number of bytes to copy.
+    :return: Bytes copied; 0 if the primitive is unsupported for these files.
+    """
+    offset = 0
+    try:
+        while offset < size:
+            copied = copy_chunk(offset, size - offset)
+            if copied == 0:
+                break
+            offset += copied
+    except OSError:
+        if offset:
+            raise
+    return offset
+
+
+def fast_copy(src: str, dst: str) -> str:
+    """
+    Copies a file and its mode/times, keeping the data inside the kernel where possible.
+
+    Tries a FICLONE reflink, then copy_file_range(2), then sendfile(2), then a
+    userspace copy. Suitable as a drop-in copy_function for shutil.copytree.
+
+    :param src: Path of the file to copy.
+    :param dst: Destination file path.
+    :return: The destination path.
+    :raises shutil.SpecialFileError: If src is a named pipe or socket.
+    """
+    # As shutil.copyfile does; opening a FIFO would block forever
+    st_mode = os.stat(src).st_mode
+    if stat.S_ISFIFO(st_mode) or stat.S_ISSOCK(st_mode):
+        raise shutil.SpecialFileError(f"`{src}` is a named pipe or socket")
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+        src_stat = os.fstat(src_fd)
+        size = src_stat.st_size
+        copied = size if size and _reflink(src_fd, dst_fd) else 0
+        if size and not copied and hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if size and not copied and hasattr(os, "copy_file_range"):
+            # Unsupported across some filesystems/kernels (EXDEV, ENOSYS, ...)
+            copied = _copy_in_kernel(
+                lambda offset, count: os.copy_file_range(
+                    src_fd, dst_fd, count, offset, offset
+                ),
+                size,
+            )
+        if size and not copied and hasattr(os, "sendfile"):
+            copied = _copy_in_kernel(
+                lambda offset, count: os.sendfile(dst_fd, src_fd, offset, count),
+                size,
+            )
+        if copied == 0 and size:
+            # No in-kernel copy available for these files
+            shutil.copyfileobj(fsrc, fdst, COPY_BUFSIZE)
+
+    os.chmod(dst, stat.S_IMODE(src_stat.st_mode))
+    os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return dst
+
+
+def write_file(
+    path: str, data: bytes, mode: int = 0o644, exclusive: bool = False
+) -> None:
+    """
+    Writes data to a file, truncating it, using raw os-level calls.
+
+    Small payloads go out in a single write() with no Python buffering layer.
+
+    :param path: Destination file path.
+    :param data: Bytes to write.
+    :param mode: Permission bits used when the file is created.
+    :param exclusive: Only create the file; raise FileExistsError if it exists.
+    """
+    flags = os.O_WRONLY | os.O_CREAT
+    flags |= os.O_EXCL if exclusive else os.O_TRUNC
+    fd = os.open(path, flags, mode)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+def ensure_dir(path: Union[str, bytes], mode: int = 0o755) -> None:
+    """
+    Creates a directory and any missing parents, like os.makedirs(exist_ok=True).
+
+    Tries the leaf first, so an existing directory costs one mkdir() rather than
+    a stat per path component; parents are only created on ENOENT.
+
+    :param path: Directory path to create, as str or bytes (bytes paths are
+        used by the mount code, which builds its targets as bytes).
+    :param mode: Permission bits for newly created directories.
+    """
+    try:
+        os.mkdir(path, mode)
+    except FileExistsError:
+        if not os.path.isdir(path):
+            raise
+    except FileNotFoundError:
+        head = os.path.dirname(os.path.normpath(path))
+        if not head or head == path:
+            raise
+        ensure_dir(head, mode)
+        try:
+            os.mkdir(path, mode)
+        except FileExistsError:
+            # Created concurrently
+            if not os.path.isdir(path):
+                raise
@@ -38,3 +38,24 @@ def test_cli_convert_help():
     result = runner.invoke(cli, ["convert", "--help"])
     assert result.exit_code == 0
     assert "--type" in result.output
+
+
+def test_format_size():
+    from d2p.CLI.main import _format_size
+
+    assert _format_size(0) == "0.0 B"
+    assert _format_size(1023) == "1023.0 B"
+    assert _format_size(1024) == "1.0 KB"
+    assert _format_size(1536 * 1024) == "1.5 MB"
+    assert _format_size(3 * 1024**6) == "3072.0 PB"
+
+
+def test_cli_info():
+    from d2p.CLI.main import _capabilities
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["info"])
+    assert result.exit_code == 0
+    assert "Isolation capabilities:" in result.output
+    # Probed once per process
+    assert _capabilities() is _capabilities()
@@ -52,3 +52,47 @@ def test_parse(tmp_path):
     assert "db_data" in config.volumes
     assert config.services["db"].volumes[0].source == "db_data"
     assert config.services["db"].volumes[0].target == "/var/lib/postgresql/data"
+
+
+def test_parse_cached(tmp_path):
+    compose_file = tmp_path / "docker-compose.yml"
+    compose_file.write_text("services:\n  web:\n    image: ${IMAGE}\n")
+    cache_dir = str(tmp_path / "cache")
+
+    parser = ComposeParser({"IMAGE": "nginx"})
+    config = parser.parse_cached(str(compose_file), cache_dir)
+    assert config.services["web"].image_name == "nginx"
+    assert len(os.listdir(cache_dir)) == 1
+
+    # Served from cache while content and variables are unchanged
+    cached = parser.parse_cached(str(compose_file), cache_dir)
+    assert cached.services["web"].image_name == "nginx"
+
+    # Changing an interpolated variable invalidates the entry
+    parser = ComposeParser({"IMAGE": "redis"})
+    config = parser.parse_cached(str(compose_file), cache_dir)
+    assert config.services["web"].image_name == "redis"
+
+    compose_file.write_text("services:\n  db:\n    image: postgres\n")
+    config = parser.parse_cached(str(compose_file), cache_dir)
+    assert list(config.services) == ["db"]
+
+
+def test_parse_cached_ignores_invalid_entry(tmp_path):
+    compose_file = tmp_path / "docker-compose.yml"
+    compose_file.write_text("services:\n  web:\n    image: nginx\n")
+    cache_dir = str(tmp_path / "cache")
+
+    parser = ComposeParser()
+    parser.parse_cached(str(compose_file), cache_dir)
+    (cache_file,) = os.listdir(cache_dir)
+
+    # An entry with the right key but an invalid payload is parsed again
+    cache_path = os.path.join(cache_dir, cache_file)
+    with open(cache_path) as f:
+        key = f.readline().rstrip("\n")
+    with open(cache_path, "w") as f:
+        f.write(f'{key}\n{{"services": []}}')
+
+    config = parser.parse_cached(str(compose_file), cache_dir)
+    assert config.services["web"].image_name == "nginx"
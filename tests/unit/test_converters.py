@@ -0,0 +1,130 @@
+# Copyright 2024 Michael Maillet, Damien Davison, Sacha Davison
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit tests for the converters.
+"""
+
+import os
+import shutil
+import stat
+import sys
+import pytest
+from d2p.CONVERTERS.to_python_package import PythonPackageConverter
+from d2p.CONVERTERS.to_systemd import SystemdConverter
+from d2p.PARSERS.compose_parser import ComposeParser
+
+COMPOSE = """
+services:
+  web:
+    command: ["python", "-m", "http.server"]
+    environment: {DEBUG: "1"}
+    working_dir: /srv
+  worker:
+    command: ["python", "worker.py"]
+    depends_on: [web]
+    restart: always
+"""
+
+
+class TestSystemdConverter:
+    """Tests for SystemdConverter."""
+
+    def test_convert_matches_single_unit_render(self, tmp_path):
+        """Test that batch rendering produces the same units as per-service rendering."""
+        config = ComposeParser({}).parse_from_string(COMPOSE)
+        converter = SystemdConverter(config)
+        converter.convert(str(tmp_path))
+
+        for name, svc in config.services.items():
+            expected = converter.template.render(
+                name=name,
+                depends_on=svc.depends_on,
+                user=svc.user,
+                working_dir=svc.working_dir,
+                base_dir=converter.base_dir,
+                command=svc.entrypoint + svc.cmd,
+                environment=svc.environment,
+                restart_policy=svc.restart_policy.condition,
+            )
+            assert (tmp_path / f"d2p-{name}.service").read_text() == expected
+
+        worker = (tmp_path / "d2p-worker.service").read_text()
+        assert "After=network.target  d2p-web.service" in worker
+        assert "ExecStart=python worker.py" in worker
+
+    def test_convert_with_separator_in_value(self, tmp_path):
+        """Test that a value containing the unit separator does not bleed into other units."""
+        config = ComposeParser({}).parse_from_string(COMPOSE)
+        config.services["web"].cmd = ["echo", "x\x1ey"]
+        SystemdConverter(config).convert(str(tmp_path))
+
+        web = (tmp_path / "d2p-web.service").read_text()
+        worker = (tmp_path / "d2p-worker.service").read_text()
+        assert "ExecStart=echo x\x1ey" in web
+        assert worker.startswith("\n[Unit]\nDescription=D2P Service: worker")
+        assert "ExecStart=python worker.py" in worker
+
+    def test_convert_creates_nested_output_dir(self, tmp_path):
+        """Test that missing parents are created and re-converting is idempotent."""
+        config = ComposeParser({}).parse_from_string(COMPOSE)
+        output_dir = tmp_path / "a" / "b" / "units"
+        converter = SystemdConverter(config)
+        converter.convert(str(output_dir))
+        converter.convert(str(output_dir))
+
+        assert (output_dir / "d2p-web.service").is_file()
+        assert (output_dir / "d2p-worker.service").is_file()
+
+
+class TestPythonPackageConverter:
+    """Tests for PythonPackageConverter."""
+
+    def _make_source(self, tmp_path):
+        source = tmp_path / "src"
+        (source / "pkg" / "sub").mkdir(parents=True)
+        (source / "__pycache__").mkdir()
+        (source / "docker-compose.yml").write_text(COMPOSE)
+        (source / "pkg" / "sub" / "mod.py").write_text("x = 1")
+        (source / "__pycache__" / "mod.pyc").write_bytes(b"\0")
+        script = source / "run.sh"
+        script.write_text("#!/bin/sh\n")
+        script.chmod(0o750)
+        return source
+
+    def test_convert_copies_tree(self, tmp_path):
+        """Test that the source tree is copied with modes, and re-running works."""
+        source = self._make_source(tmp_path)
+        output = source / "package"
+        config = ComposeParser({}).parse_from_string(COMPOSE)
+        converter = PythonPackageConverter(config, str(source))
+        converter.convert(str(output))
+        converter.convert(str(output))
+
+        assert (output / "pkg" / "sub" / "mod.py").read_text() == "x = 1"
+        assert stat.S_IMODE(os.stat(output / "run.sh").st_mode) == 0o750
+        assert (output / "run_native.py").is_file()
+        assert (output / "requirements_native.txt").read_text() == "d2p\n"
+        assert not (output / "__pycache__").exists()
+        assert not (output / "package").exists()
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="Needs named pipes")
+    def test_convert_rejects_fifo(self, tmp_path):
+        """Test that a named pipe in the source tree fails instead of blocking."""
+        source = self._make_source(tmp_path)
+        os.mkfifo(source / "pipe")
+        config = ComposeParser({}).parse_from_string(COMPOSE)
+
+        with pytest.raises(shutil.SpecialFileError):
+            PythonPackageConverter(config, str(source)).convert(str(tmp_path / "out"))
@@ -0,0 +1,52 @@
+# Copyright 2024 Michael Maillet, Damien Davison, Sacha Davison
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit tests for the environment manager.
+"""
+
+import os
+from d2p.MANAGERS.environment_manager import EnvironmentManager
+
+
+class TestEnvironmentManager:
+    """Tests for EnvironmentManager."""
+
+    def test_merge_order(self, tmp_path):
+        """Test .env files override the process env and explicit values win."""
+        (tmp_path / "a.env").write_text("SHARED=a\nONLY_A=1\n")
+        (tmp_path / "b.env").write_text("SHARED=b\n")
+        em = EnvironmentManager(base_dir=str(tmp_path))
+
+        env = em.get_merged_environment(
+            {"EXPLICIT": "x"}, ["a.env", "b.env", "missing.env"]
+        )
+
+        assert env["SHARED"] == "b"
+        assert env["ONLY_A"] == "1"
+        assert env["EXPLICIT"] == "x"
+        assert env["PATH"] == os.environ["PATH"]
+
+    def test_env_file_reparsed_when_changed(self, tmp_path):
+        """Test a cached .env file is re-read once it changes on disk."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("D2P_TEST_KEY=old\n")
+        em = EnvironmentManager(base_dir=str(tmp_path))
+        assert em.get_merged_environment({}, [".env"])["D2P_TEST_KEY"] == "old"
+
+        env_file.write_text("D2P_TEST_KEY=newer\n")
+        assert em.get_merged_environment({}, [".env"])["D2P_TEST_KEY"] == "newer"
+
+        env_file.unlink()
+        assert "D2P_TEST_KEY" not in em.get_merged_environment({}, [".env"])
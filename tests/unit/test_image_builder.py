@@ -0,0 +1,128 @@
+# Copyright 2024 Michael Maillet, Damien Davison, Sacha Davison
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit tests for the image builder.
+"""
+
+import gc
+import os
+from d2p.BUILDERS.image_builder import BuildContext, ImageBuilder, LayerCache
+from d2p.MODELS.container_image import ContainerImage
+
+
+class TestImageBuilder:
+    """Tests for ImageBuilder."""
+
+    def test_parse_is_cached_until_file_changes(self, tmp_path):
+        """Test that an unchanged Dockerfile is only parsed once."""
+        dockerfile = tmp_path / "Dockerfile"
+        dockerfile.write_text("FROM python:3.11\nWORKDIR /app\n")
+        builder = ImageBuilder(str(tmp_path))
+
+        first = builder._parse_cached(str(dockerfile))
+        assert builder._parse_cached(str(dockerfile)) is first
+
+        dockerfile.write_text('FROM python:3.12\nWORKDIR /srv\nCMD ["app"]\n')
+        st = os.stat(dockerfile)
+        os.utime(dockerfile, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        image = builder.build("Dockerfile", "test")
+        assert image.base_image == "python:3.12"
+        assert image.working_directory == "/srv"
+
+    def test_pip_install_args(self):
+        """Test extraction of pip install arguments from RUN instructions."""
+        builder = ImageBuilder()
+        args = builder._pip_install_args(
+            'apt-get install -y gcc && pip install "flask>=2,<3" pip-tools'
+        )
+        assert args == ["flask>=2,<3", "pip-tools"]
+        assert builder._pip_install_args("python -m pip install -r req.txt") == [
+            "-r",
+            "req.txt",
+        ]
+        assert builder._pip_install_args("echo pip install") == []
+
+    def test_execute_copies(self, tmp_path):
+        """Test that COPY sources are copied and missing or bad sources are skipped."""
+        context = tmp_path / "context"
+        (context / "pkg").mkdir(parents=True)
+        (context / "app.py").write_text("print('hi')")
+        (context / "pkg" / "mod.py").write_text("x = 1")
+        rootfs = tmp_path / "rootfs"
+
+        image = ContainerImage(
+            name="test", base_image="python", working_directory="/app"
+        )
+        image.copy_instructions = [
+            {
+                "sources": ["app.py", "missing.txt", "app.py/x"],
+                "dest": "./",
+                "from_stage": None,
+            },
+            {"sources": ["pkg"], "dest": "/opt/pkg", "from_stage": None},
+            {"sources": ["app.py"], "dest": "main.py", "from_stage": None},
+        ]
+        ImageBuilder().execute_copies(image, str(rootfs), str(context))
+
+        assert (rootfs / "app" / "app.py").read_text() == "print('hi')"
+        assert (rootfs / "app" / "main.py").exists()
+        assert (rootfs / "opt" / "pkg" / "mod.py").read_text() == "x = 1"
+        assert not (rootfs / "app" / "missing.txt").exists()
+
+    def test_build_with_context_substitutes_env_build_args(self, tmp_path):
+        """Test build arg substitution across multiple values of one ENV line."""
+        (tmp_path / "Dockerfile").write_text(
+            "FROM python:3.11\n"
+            "ARG VERSION=1.0\n"
+            "ENV APP_VERSION=$VERSION HOME_DIR=/opt/${NAME} PLAIN=value\n"
+        )
+        context = BuildContext(
+            base_dir=str(tmp_path),
+            dockerfile_path="Dockerfile",
+            image_name="test",
+            build_args={"NAME": "app"},
+        )
+        image = ImageBuilder(str(tmp_path)).build_with_context(context)
+
+        assert image.env_vars == {
+            "APP_VERSION": "1.0",
+            "HOME_DIR": "/opt/app",
+            "PLAIN": "value",
+        }
+
+
+class TestLayerCache:
+    """Tests for LayerCache."""
+
+    def test_put_is_written_on_flush(self, tmp_path):
+        """Test that index changes are batched until flush()."""
+        cache = LayerCache(str(tmp_path / "cache"))
+        cache.put("key", str(tmp_path), "RUN echo hi")
+        assert not cache.index_file.exists()
+
+        cache.flush()
+        assert LayerCache(str(tmp_path / "cache")).get("key") == str(tmp_path)
+
+    def test_put_from_dropped_instance_persists(self, tmp_path):
+        """Test that a put is written out when the cache is garbage-collected."""
+        cache_dir = str(tmp_path / "cache")
+
+        def put_and_drop():
+            LayerCache(cache_dir).put("k1", str(tmp_path), "RUN x")
+
+        put_and_drop()
+        gc.collect()
+        assert LayerCache(cache_dir).get("k1") == str(tmp_path)
@@ -15,6 +15,9 @@
 """
 Unit tests for the isolation module.
 """
+
+import os
+import shutil
 import sys
 import pytest
 from d2p.ISOLATION.namespace_manager import (
@@ -23,6 +26,7 @@ from d2p.ISOLATION.namespace_manager import (
     NamespaceType,
 )
 from d2p.ISOLATION.cgroup_manager import CgroupManager, ResourceLimits
+from d2p.ISOLATION.filesystem_isolation import FilesystemIsolation
 from d2p.ISOLATION.isolated_runner import IsolatedRunner, IsolationConfig
 
 
@@ -84,6 +88,237 @@ class TestCgroupManager:
         limits = ResourceLimits(cpus=0.5)
         assert limits.cpu_quota == 50000  # 0.5 * 100000
 
+    def test_resource_limits_has_limits(self):
+        """Test has_limits only reports limits that get written."""
+        assert not ResourceLimits().has_limits
+        assert not ResourceLimits(io_read_bps=1024).has_limits
+        assert ResourceLimits(cpus=1).has_limits
+        assert ResourceLimits(pids_limit=10).has_limits
+
+    def test_apply_limits_writes_existing_files(self, tmp_path):
+        """Test limits are written to present control files and missing ones are skipped."""
+        for name in ("cpu.max", "memory.max", "pids.max", "cgroup.procs"):
+            (tmp_path / name).write_text("max")
+        mgr = CgroupManager(
+            "test", ResourceLimits(cpus=0.5, memory_limit=1024, io_weight=50)
+        )
+        mgr._set_cgroup_path(tmp_path)
+        mgr._initialized = True
+
+        assert mgr.apply_limits()
+        assert (tmp_path / "cpu.max").read_text() == "50000 100000"
+        assert (tmp_path / "memory.max").read_text() == "1024"
+        assert (tmp_path / "pids.max").read_text() == "max"
+        assert not (tmp_path / "io.weight").exists()
+
+        assert mgr.add_process(1234)
+        assert (tmp_path / "cgroup.procs").read_text() == "1234"
+
+    def test_get_stats(self, tmp_path):
+        """Test stats are read from present control files and missing ones are skipped."""
+        (tmp_path / "cpu.stat").write_text("usage_usec 150\nuser_usec 100\n")
+        (tmp_path / "memory.current").write_text("4096\n")
+        mgr = CgroupManager("test")
+        mgr._set_cgroup_path(tmp_path)
+        mgr._initialized = True
+
+        assert mgr.get_stats() == {
+            "cpu.usage_usec": 150,
+            "cpu.user_usec": 100,
+            "memory.current": 4096,
+        }
+
+        stats = mgr.poll_stats()
+        assert stats.cpu_usage_usec == 150
+        assert stats.cpu_system_usec == 0
+        assert stats.to_dict()["memory.current"] == 4096
+
+        # Polling re-reads through the cached fds
+        (tmp_path / "memory.current").write_text("8192\n")
+        assert mgr.get_stats()["memory.current"] == 8192
+        mgr._close_stat_fds()
+        assert mgr._stat_fds == {}
+
+    def test_batch_get_stats(self, tmp_path):
+        """Test batch polling returns one stats dict per manager, in order."""
+        managers = []
+        for i in range(CgroupManager.BATCH_INLINE_LIMIT + 2):
+            cgroup = tmp_path / f"svc{i}"
+            cgroup.mkdir()
+            (cgroup / "pids.current").write_text(f"{i}\n")
+            mgr = CgroupManager(f"svc{i}")
+            mgr._set_cgroup_path(cgroup)
+            mgr._initialized = True
+            managers.append(mgr)
+
+        stats = CgroupManager.batch_get_stats(managers)
+        assert [s["pids.current"] for s in stats] == list(range(len(managers)))
+        assert CgroupManager.batch_get_stats(managers[:2]) == stats[:2]
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_create_enables_subtree_once(self, tmp_path):
+        """Test the shared parent's subtree_control is written by the first create only."""
+        subtree_control = tmp_path / "d2p" / "cgroup.subtree_control"
+        subtree_control.parent.mkdir()
+        subtree_control.write_text("")
+        managers = [CgroupManager(name) for name in ("web", "worker")]
+        for mgr in managers:
+            mgr.CGROUP_V2_ROOT = str(tmp_path)
+            mgr._is_v2 = True
+
+        assert managers[0].create()
+        assert subtree_control.read_text() == "+cpu +memory +io +pids"
+        subtree_control.write_text("")
+        assert managers[1].create()
+        assert subtree_control.read_text() == ""
+        assert (tmp_path / "d2p" / "worker").is_dir()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_create_batch(self, tmp_path, monkeypatch):
+        """Test batch creation provisions one cgroup per spec, in order."""
+        (tmp_path / "cgroup.controllers").write_text("cpu memory")
+        monkeypatch.setattr(CgroupManager, "CGROUP_V2_ROOT", str(tmp_path))
+        specs = [
+            (f"batch{i}", ResourceLimits(pids_limit=10))
+            for i in range(CgroupManager.BATCH_INLINE_LIMIT + 2)
+        ]
+
+        managers = CgroupManager.create_batch(specs)
+        assert [mgr.name for mgr in managers] == [name for name, _ in specs]
+        assert all(mgr._initialized for mgr in managers)
+        assert all((tmp_path / "d2p" / name).is_dir() for name, _ in specs)
+
+    def test_cleanup_pools_empty_cgroup(self, tmp_path):
+        """Test an empty cgroup is reset and kept for reuse instead of removed."""
+        from d2p.ISOLATION.cgroup_manager import _cgroup_pool
+
+        cgroup = tmp_path / "svc"
+        cgroup.mkdir()
+        (cgroup / "cgroup.procs").write_text("")
+        (cgroup / "memory.max").write_text("0")
+        mgr = CgroupManager("svc", ResourceLimits(memory_limit=1024))
+        mgr._set_cgroup_path(cgroup)
+        mgr._initialized = True
+
+        assert mgr.cleanup()
+        assert cgroup.is_dir()
+        assert (cgroup / "memory.max").read_text() == "max"
+        assert _cgroup_pool.acquire(str(cgroup))
+        assert not _cgroup_pool.acquire(str(cgroup))
+
+    def test_cleanup_does_not_pool_busy_cgroup(self, tmp_path):
+        """Test a cgroup that still has processes is not pooled."""
+        from d2p.ISOLATION.cgroup_manager import _cgroup_pool
+
+        (tmp_path / "cgroup.procs").write_text("1234\n")
+        mgr = CgroupManager("svc")
+        mgr._set_cgroup_path(tmp_path)
+        mgr._initialized = True
+
+        mgr.cleanup()
+        assert not _cgroup_pool.acquire(str(tmp_path))
+
+
+class TestFilesystemIsolation:
+    """Tests for FilesystemIsolation."""
+
+    def test_prepare_rootfs(self, tmp_path):
+        """Test the rootfs skeleton is created and re-preparing is idempotent."""
+        fs = FilesystemIsolation()
+        fs._is_root = False
+        rootfs = fs.prepare_rootfs(str(tmp_path))
+
+        assert rootfs == str(tmp_path / "rootfs")
+        for d in ("bin", "etc", "usr/lib64", "var/log"):
+            assert (tmp_path / "rootfs" / d).is_dir()
+        assert "root:x:0:0" in (tmp_path / "rootfs" / "etc" / "passwd").read_text()
+        hosts = tmp_path / "rootfs" / "etc" / "hosts"
+        hosts.write_text("10.0.0.1 db\n")
+        assert fs.prepare_rootfs(str(tmp_path)) == rootfs
+        assert hosts.read_text() == "10.0.0.1 db\n"
+
+    def test_resolv_conf_not_left_empty(self, tmp_path, monkeypatch):
+        """Test a failed resolv.conf copy is retried on the next prepare."""
+
+        def failing_copy(src, dst):
+            raise PermissionError(src)
+
+        fs = FilesystemIsolation()
+        etc = tmp_path / "etc"
+        etc.mkdir()
+        monkeypatch.setattr(
+            "d2p.ISOLATION.filesystem_isolation.fast_copy", failing_copy
+        )
+        with pytest.raises(PermissionError):
+            fs._create_etc_files(etc)
+        assert not (etc / "resolv.conf").exists()
+
+        monkeypatch.undo()
+        fs._create_etc_files(etc)
+        assert (etc / "resolv.conf").stat().st_size > 0
+
+    def test_create_mount_points(self, tmp_path):
+        """Test mount points are created up front, except beneath earlier mounts."""
+        from d2p.ISOLATION.filesystem_isolation import _create_mount_points
+
+        root = os.fsencode(tmp_path)
+        _create_mount_points(
+            [
+                (root + b"/proc", True),
+                (root + b"/data", True),
+                (root + b"/data/cache", True),
+                (root + b"/etc/app/config.yml", False),
+                (root + b"/usr/local/share", True),
+            ]
+        )
+
+        assert (tmp_path / "proc").is_dir()
+        assert (tmp_path / "data").is_dir()
+        assert not (tmp_path / "data" / "cache").exists()
+        assert (tmp_path / "etc" / "app" / "config.yml").is_file()
+        assert (tmp_path / "usr" / "local" / "share").is_dir()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_read_needed(self, tmp_path):
+        """Test DT_NEEDED entries are read without running ldd."""
+        from d2p.ISOLATION.filesystem_isolation import _read_needed
+
+        deps = _read_needed(os.path.realpath(shutil.which("sh")))
+        assert deps is not None
+        assert any(name.startswith("libc.") for name in deps.needed)
+
+        script = tmp_path / "script.sh"
+        script.write_text("#!/bin/sh\n")
+        assert _read_needed(str(script)) is None
+        assert _read_needed(str(tmp_path / "missing")) is None
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_copy_host_binaries(self, tmp_path):
+        """Test binaries and their shared libraries are copied into the rootfs."""
+        sh = os.path.realpath(shutil.which("sh"))
+        fs = FilesystemIsolation()
+
+        assert fs.copy_host_binaries(str(tmp_path), [sh, "no-such-binary"])
+        assert (tmp_path / sh.lstrip("/")).is_file()
+        assert list(tmp_path.rglob("libc.so*"))
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_copy_host_binaries_library_failure(self, tmp_path, monkeypatch):
+        """Test a library that fails to copy is skipped, not raised."""
+
+        def failing_copy(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(
+            "d2p.ISOLATION.filesystem_isolation.fast_copy", failing_copy
+        )
+        sh = os.path.realpath(shutil.which("sh"))
+        fs = FilesystemIsolation()
+
+        assert fs.copy_host_binaries(str(tmp_path), [sh])
+        assert (tmp_path / sh.lstrip("/")).is_file()
+        assert not fs._copied
+
 
 class TestIsolatedRunner:
     """Tests for IsolatedRunner."""
@@ -115,3 +350,62 @@ class TestIsolatedRunner:
         runner = IsolatedRunner("test")
         expected = sys.platform.startswith("linux")
         assert runner.is_linux == expected
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_wrapper_execs_command(self, tmp_path):
+        """Test the isolation wrapper changes directory and execs the command."""
+        import subprocess
+
+        from d2p.ISOLATION.isolated_runner import WRAPPER_PATH, WRAPPER_PYTHON_FLAGS
+
+        # NS_FLAGS HOSTNAME CWD CGROUP_PROCS UID GID NO_NEW_PRIVS -- COMMAND
+        args = ["0", "", str(tmp_path), "", "", "", "1", "--"]
+        result = subprocess.run(
+            [sys.executable, *WRAPPER_PYTHON_FLAGS, WRAPPER_PATH, *args]
+            + ["sh", "-c", 'pwd; echo "$D2P_TEST"'],
+            env={**os.environ, "D2P_TEST": "wrapped"},
+            capture_output=True,
+            text=True,
+        )
+        assert result.stdout.split() == [str(tmp_path), "wrapped"]
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_run_basic_sets_no_new_privs(self, tmp_path):
+        """Test a basic run starts without preexec_fn and with no_new_privs set."""
+        runner = IsolatedRunner("test-nnp", IsolationConfig(working_dir=str(tmp_path)))
+        process = runner.run(["sh", "-c", "pwd; grep NoNewPrivs /proc/self/status"])
+        out, _ = process.communicate(timeout=10)
+        runner.stop()
+
+        assert out.split() == [str(tmp_path), "NoNewPrivs:", "1"]
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_stop(self):
+        """Test stop terminates the process, escalating to SIGKILL on timeout."""
+        runner = IsolatedRunner("test-stop")
+        runner.run(["sh", "-c", "trap '' TERM; echo ready; sleep 30"])
+        assert runner._process.stdout.readline() == "ready\n"
+        assert runner.is_running()
+
+        runner.stop(timeout=0.2)
+
+        assert not runner.is_running()
+        assert runner._pidfd is None
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+    def test_run_all(self):
+        """Test a group of runners is started in order."""
+        from d2p.ISOLATION.isolated_runner import run_all
+
+        runners = [IsolatedRunner(f"test-group-{i}") for i in range(3)]
+        processes = run_all(
+            [(runner, ["sh", "-c", f"echo {i}"]) for i, runner in enumerate(runners)]
+        )
+
+        assert [p.communicate(timeout=10)[0] for p in processes] == [
+            "0\n",
+            "1\n",
+            "2\n",
+        ]
+        for runner in runners:
+            runner.stop()